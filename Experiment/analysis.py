@@ -0,0 +1,721 @@
+"""
+Analyse the results of batch.py, and compare controllers.
+
+Results are loaded in one bulk read into NumPy arrays, and everything
+below works on whole arrays at once, so a million trials take seconds:
+
+    $ python3 analysis.py results.csv --bins 15
+
+Each controller is summarised over the trials it succeeded in, and again
+counting its timeouts as censored: the trial would have finished, but
+only after the time limit. Outliers are flagged by Tukey's fences.
+
+Trials of different controllers with the same seed faced the same layout,
+so controllers are compared by the difference in their durations seed by
+seed, rather than as independent samples. The layout's share of the
+variance cancels out of each difference, which leaves a narrower interval
+for the same number of trials. A timeout is censored there as in the
+summaries, counted as finishing at the time limit rather than left out,
+and the seeds on which only one controller finished are tested on their
+own as well.
+
+A SequentialTest makes the same comparison as results arrive, so that
+batch.py can stop a batch as soon as it is decided. The time files which
+the controllers write themselves, a line per trial and "Fail" for a
+failure, can be read too.
+"""
+
+from __future__ import division, print_function
+
+import argparse
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+
+OUTCOME_SUCCESS = 'success'
+OUTCOME_TIMEOUT = 'timeout'
+OUTCOME_ERROR = 'error'
+# Outcomes are stored as their index here; any other counts as an error
+OUTCOMES = [OUTCOME_SUCCESS, OUTCOME_TIMEOUT, OUTCOME_ERROR]
+
+# Columns of a results file, as batch.py writes them
+RESULT_COLUMNS = ['trial', 'controller', 'seed', 'outcome', 'duration', 'host', 'config']
+# Those read for analysis, all in one pass, in the order that
+# Results.from_columns takes them; names are read as Python strings
+CSV_FIELDS = [('controller', object), ('config', object), ('seed', np.int64),
+              ('outcome', object), ('duration', np.float64)]
+
+# The line a controller's own time file has for a failed trial, and the
+# `timeout 150s` which runtest.sh put on each of those trials
+FAILED_LINE = 'Fail'
+TIME_FILE_LIMIT = 150
+
+DEFAULT_CONFIDENCE = 0.95
+DEFAULT_ALPHA = 0.05
+DEFAULT_RESAMPLES = 1000
+
+# Durations further than this many interquartile ranges outside the
+# quartiles are outliers
+OUTLIER_FENCE = 1.5
+
+# Bound on the resample counts a bootstrap holds in memory at once, and
+# on the distinct values it resamples
+BOOTSTRAP_CHUNK_CELLS = 10 ** 7
+BOOTSTRAP_BINS = 2000
+
+# Distinct controllers or configs found by scanning before sorting instead
+NAMES_SCANNED = 32
+
+# Seeds a sequential test waits for between looks at the results
+LOOK_PAIRS = 5
+
+DECISION_FIRST_FASTER = 'first faster'
+DECISION_SECOND_FASTER = 'second faster'
+DECISION_EQUIVALENT = 'equivalent'
+DECISION_BUDGET_SPENT = 'budget spent'
+
+# Continued fraction evaluation of the incomplete beta function
+BETA_ITERATIONS = 200
+BETA_EPSILON = 3e-14
+BETA_TINY = 1e-300
+
+Summary = namedtuple('Summary', [
+    'controller', 'trials', 'successes', 'timeouts', 'errors',
+    # Over the trials which succeeded
+    'mean', 'std', 'median', 'minimum', 'maximum',
+    # Kaplan-Meier estimates with timeouts censored, the mean restricted
+    # to the longest duration seen, the horizon
+    'censored_median', 'restricted_mean', 'horizon',
+    'outliers', 'fences',
+])
+
+PairedTTest = namedtuple('PairedTTest', [
+    'mean_difference', 'std_error', 'interval', 't_value', 'p_value',
+])
+
+Pairs = namedtuple('Pairs', [
+    # Seeds on which each controller either succeeded or timed out, their
+    # durations on each, and whether each succeeded
+    'seeds', 'first', 'second', 'first_finished', 'second_finished',
+    # Seeds left out: those on which either controller failed with an
+    # error, and those only one of them ran on
+    'errored', 'unpaired',
+])
+
+PairedComparison = namedtuple('PairedComparison', [
+    'first', 'second',
+    # Seeds paired, and those left out
+    'pairs', 'errored', 'unpaired',
+    'mean_difference', 'std_error', 'interval', 't_value', 'p_value',
+    # Pairs in which either controller timed out, those in which only the
+    # first or only the second finished, and McNemar's test of whether
+    # either finishes more often
+    'censored', 'only_first_finished', 'only_second_finished', 'outcome_p_value',
+    # How many unpaired trials per controller would give the same
+    # standard error as each pair does
+    'sample_size_gain',
+])
+
+
+def _codes_in_order(values):
+    # Names in the order they first appear, and each value's index among
+    # them. There are few names, so comparing the whole array against each
+    # in turn beats sorting it
+    codes = np.full(len(values), -1, dtype=np.intp)
+    names = []
+    while len(names) < NAMES_SCANNED:
+        unnamed = np.flatnonzero(codes < 0)
+        if not len(unnamed):
+            return names, codes
+        name = values[unnamed[0]]
+        codes[values == name] = len(names)
+        names.append(str(name))
+    names, first, inverse = np.unique(values, return_index=True, return_inverse=True)
+    order = np.argsort(first, kind='mergesort')
+    rank = np.empty(len(order), dtype=np.intp)
+    rank[order] = np.arange(len(order))
+    return [str(name) for name in names[order]], rank[inverse.ravel()]
+
+def _outcome_codes(outcomes):
+    codes = np.full(len(outcomes), OUTCOMES.index(OUTCOME_ERROR), dtype=np.int8)
+    for code, outcome in enumerate(OUTCOMES):
+        codes[outcomes == outcome] = code
+    return codes
+
+class Results(object):
+    """
+    Trial results as NumPy arrays with an element per trial, in the order
+    they were written. Controllers and configs are held as indices into
+    the lists of their names, ``controllers`` and ``configs``.
+    """
+
+    def __init__(self, controllers, controller, configs, config, seed, outcome, duration):
+        self.controllers = controllers
+        self.controller = controller
+        self.configs = configs
+        self.config = config
+        self.seed = seed
+        self.outcome = outcome
+        self.duration = duration
+
+    def __len__(self):
+        return len(self.seed)
+
+    @classmethod
+    def from_columns(cls, controller, config, seed, outcome, duration):
+        controllers, controller_codes = _codes_in_order(np.asarray(controller, dtype=str))
+        configs, config_codes = _codes_in_order(np.asarray(config, dtype=str))
+        return cls(controllers, controller_codes, configs, config_codes,
+                   np.asarray(seed, dtype=np.int64),
+                   _outcome_codes(np.asarray(outcome, dtype=str)),
+                   np.asarray(duration, dtype=np.float64))
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Results from result rows as batch.py makes them.
+        """
+        return cls.from_columns(*[[row[key] for row in rows]
+                                  for key in ('controller', 'config', 'seed',
+                                              'outcome', 'duration')])
+
+    @classmethod
+    def concatenate(cls, parts):
+        parts = list(parts)
+        if len(parts) == 1:
+            return parts[0]
+        def merge(attribute):
+            names = []
+            codes = []
+            for part in parts:
+                part_names = getattr(part, attribute + 's')
+                for name in part_names:
+                    if name not in names:
+                        names.append(name)
+                recode = np.array([names.index(name) for name in part_names], dtype=np.intp)
+                codes.append(recode[getattr(part, attribute)] if len(recode)
+                             else np.zeros(0, dtype=np.intp))
+            return names, np.concatenate(codes)
+        controllers, controller = merge('controller')
+        configs, config = merge('config')
+        return cls(controllers, controller, configs, config,
+                   *[np.concatenate([getattr(part, attribute) for part in parts])
+                     for attribute in ('seed', 'outcome', 'duration')])
+
+    def select(self, mask):
+        """
+        The results of the trials selected by an index or boolean array.
+        """
+        return Results(self.controllers, self.controller[mask], self.configs,
+                       self.config[mask], self.seed[mask], self.outcome[mask],
+                       self.duration[mask])
+
+    def of(self, controller):
+        if controller not in self.controllers:
+            return self.select(np.zeros(len(self), dtype=bool))
+        return self.select(self.controller == self.controllers.index(controller))
+
+    def succeeded(self):
+        return self.outcome == OUTCOMES.index(OUTCOME_SUCCESS)
+
+    def timed_out(self):
+        return self.outcome == OUTCOMES.index(OUTCOME_TIMEOUT)
+
+
+def _read_csv(path):
+    columns = dict((name, index) for index, name in enumerate(RESULT_COLUMNS))
+    table = np.loadtxt(path, delimiter=',', quotechar='"', skiprows=1, ndmin=1,
+                       usecols=[columns[name] for name, _ in CSV_FIELDS],
+                       dtype=CSV_FIELDS)
+    return Results.from_columns(*[table[name] for name, _ in CSV_FIELDS])
+
+def _read_time_file(path):
+    lines = np.loadtxt(path, dtype=str, ndmin=1, delimiter=',')
+    failed = lines == FAILED_LINE
+    durations = np.full(len(lines), float(TIME_FILE_LIMIT))
+    durations[~failed] = lines[~failed].astype(np.float64)
+    name = os.path.splitext(os.path.basename(path))[0]
+    # The trials were not seeded, so none of them pair with any other
+    return Results.from_columns(np.full(len(lines), name), np.full(len(lines), path),
+                                np.arange(len(lines)),
+                                np.where(failed, OUTCOME_TIMEOUT, OUTCOME_SUCCESS),
+                                durations)
+
+def read_results(path):
+    """
+    Read a results file written by batch.py, or a controller's own time
+    file, in one bulk read.
+    """
+    with open(path) as f:
+        header = f.readline().strip()
+    if header.split(',') == RESULT_COLUMNS:
+        return _read_csv(path)
+    return _read_time_file(path)
+
+
+def kaplan_meier(durations, completed):
+    """
+    The Kaplan-Meier estimate of the chance that a trial is still running,
+    from durations of which those not ``completed`` are censored. Returns
+    the times at which trials completed, and the estimate just after each.
+    """
+    order = np.argsort(durations, kind='mergesort')
+    times = durations[order]
+    events = completed[order].astype(np.int64)
+    unique_times, first = np.unique(times, return_index=True)
+    if not len(unique_times):
+        return unique_times, unique_times
+    # Trials censored at a time are still at risk of completing at it
+    at_risk = len(times) - first
+    finished = np.add.reduceat(events, first)
+    some = finished > 0
+    survival = np.cumprod(1 - finished[some] / at_risk[some])
+    return unique_times[some], survival
+
+def tukey_fences(values, fence=OUTLIER_FENCE):
+    low, high = np.percentile(values, [25, 75])
+    spread = high - low
+    return float(low - fence * spread), float(high + fence * spread)
+
+def outliers(results, fence=OUTLIER_FENCE):
+    """
+    Flag the successful trials whose durations are outliers among their
+    controller's.
+    """
+    flags = np.zeros(len(results), dtype=bool)
+    succeeded = results.succeeded()
+    for code in range(len(results.controllers)):
+        mine = succeeded & (results.controller == code)
+        if mine.any():
+            low, high = tukey_fences(results.duration[mine], fence)
+            flags |= mine & ((results.duration < low) | (results.duration > high))
+    return flags
+
+def summarise(results, controller, fence=OUTLIER_FENCE):
+    mine = results.of(controller)
+    succeeded = mine.succeeded()
+    timed_out = mine.timed_out()
+    durations = mine.duration[succeeded]
+    stats = [float('nan')] * 5
+    fences = (float('nan'), float('nan'))
+    outlying = 0
+    if len(durations):
+        stats = [float(durations.mean()),
+                 float(durations.std(ddof=1)) if len(durations) > 1 else 0.0,
+                 float(np.median(durations)), float(durations.min()), float(durations.max())]
+        fences = tukey_fences(durations, fence)
+        outlying = int(((durations < fences[0]) | (durations > fences[1])).sum())
+
+    # Errors say nothing about how long a trial would have taken
+    timed = succeeded | timed_out
+    times, survival = kaplan_meier(mine.duration[timed], succeeded[timed])
+    censored_median = restricted_mean = horizon = float('nan')
+    if timed.any():
+        horizon = float(mine.duration[timed].max())
+        below = np.flatnonzero(survival <= 0.5)
+        if len(below):
+            censored_median = float(times[below[0]])
+        edges = np.concatenate([[0], times, [horizon]])
+        levels = np.concatenate([[1], survival])
+        restricted_mean = float((levels * np.diff(edges)).sum())
+
+    return Summary(controller, len(mine), int(succeeded.sum()), int(timed_out.sum()),
+                   len(mine) - int(succeeded.sum()) - int(timed_out.sum()),
+                   *stats, censored_median=censored_median,
+                   restricted_mean=restricted_mean, horizon=horizon,
+                   outliers=outlying, fences=fences)
+
+def format_summary(summary, interval=None, confidence=DEFAULT_CONFIDENCE):
+    s = summary
+    lines = ["{0}: {1} trials, {2} succeeded, {3} timed out, {4} errors"
+             .format(s.controller, s.trials, s.successes, s.timeouts, s.errors)]
+    if s.successes:
+        lines.append("  succeeded in {0:.2f}s mean (sd {1:.2f}), median {2:.2f}s, "
+                     "range {3:.2f}s to {4:.2f}s"
+                     .format(s.mean, s.std, s.median, s.minimum, s.maximum))
+    if interval is not None:
+        lines.append("  {0:.0%} bootstrap interval of the mean [{1:.2f}, {2:.2f}]"
+                     .format(confidence, interval[0], interval[1]))
+    if s.timeouts:
+        lines.append("  with timeouts censored: median {0:.2f}s, mean to {1:.2f}s {2:.2f}s"
+                     .format(s.censored_median, s.horizon, s.restricted_mean))
+    if s.outliers:
+        lines.append("  {0} outliers outside {1:.2f}s to {2:.2f}s"
+                     .format(s.outliers, s.fences[0], s.fences[1]))
+    return "\n".join(lines)
+
+def format_histogram(durations, bins, value_range=None, width=40):
+    counts, edges = np.histogram(durations, bins, value_range)
+    scale = width / max(counts.max(), 1) if len(counts) else 0
+    return "\n".join("  {0:7.2f} - {1:7.2f} {2:<{3}} {4}"
+                     .format(low, high, '#' * int(round(count * scale)), width, count)
+                     for low, high, count in zip(edges[:-1], edges[1:], counts))
+
+
+def bootstrap_interval(values, confidence=DEFAULT_CONFIDENCE, resamples=DEFAULT_RESAMPLES,
+                       statistic='mean', rng=None):
+    """
+    Percentile bootstrap interval of the mean or median of the values.
+
+    Resampling with replacement amounts to drawing counts of each distinct
+    value from a multinomial, so each resample costs only as much as there
+    are distinct values, which rounded durations keep few.
+    """
+    rng = rng if rng is not None else np.random.default_rng()
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    if n == 0:
+        return (float('nan'), float('nan'))
+    distinct, counts = np.unique(values, return_counts=True)
+    if len(distinct) > BOOTSTRAP_BINS:
+        # Group into narrow bins, each standing in by the mean of its values:
+        # the resampled means keep their centre, and lose only the spread
+        # within bins from theirs
+        edges = np.linspace(distinct[0], distinct[-1], BOOTSTRAP_BINS + 1)
+        bins = np.clip(np.searchsorted(edges, distinct, 'right') - 1, 0, BOOTSTRAP_BINS - 1)
+        totals = np.bincount(bins, weights=distinct * counts, minlength=BOOTSTRAP_BINS)
+        counts = np.bincount(bins, weights=counts, minlength=BOOTSTRAP_BINS)
+        used = counts > 0
+        distinct, counts = totals[used] / counts[used], counts[used]
+    chunk = max(1, BOOTSTRAP_CHUNK_CELLS // len(distinct))
+    estimates = []
+    for start in range(0, resamples, chunk):
+        drawn = rng.multinomial(n, counts / n, size=min(chunk, resamples - start))
+        if statistic == 'mean':
+            estimates.append(drawn.dot(distinct) / n)
+        else:
+            middle = np.argmax(np.cumsum(drawn, axis=1) >= n / 2, axis=1)
+            estimates.append(distinct[middle])
+    tail = (1 - confidence) / 2 * 100
+    low, high = np.percentile(np.concatenate(estimates), [tail, 100 - tail])
+    return (float(low), float(high))
+
+
+def paired_durations(results, first, second):
+    """
+    Pair up the two controllers' trials by seed, as Pairs. A timed out
+    trial keeps its duration, the time limit, as a censored value; a
+    trial which failed with an error says nothing about how long it would
+    have taken, so its seed is left out. A seed run again in a later batch
+    counts its latest result.
+    """
+    codes = [results.controllers.index(name) if name in results.controllers else -1
+             for name in (first, second)]
+    mine = np.flatnonzero(np.isin(results.controller, codes))
+    seeds = results.seed[mine]
+    # One integer per config and seed, for unique to sort quickly
+    low = seeds.min() if len(mine) else 0
+    span = (seeds.max() - low + 1) if len(mine) else 1
+    keys, key_ids = np.unique(results.config[mine] * span + (seeds - low),
+                              return_inverse=True)
+    key_ids = key_ids.ravel()
+    latest = []
+    for code in codes:
+        trials = np.full(len(keys), -1, dtype=np.int64)
+        ours = results.controller[mine] == code
+        np.maximum.at(trials, key_ids[ours], mine[ours])
+        latest.append(trials)
+    ran = (latest[0] >= 0) & (latest[1] >= 0)
+    timed = results.succeeded() | results.timed_out()
+    both = ran.copy()
+    both[ran] = timed[latest[0][ran]] & timed[latest[1][ran]]
+    succeeded = results.succeeded()
+    return Pairs(keys[both] % span + low,
+                 results.duration[latest[0][both]], results.duration[latest[1][both]],
+                 succeeded[latest[0][both]], succeeded[latest[1][both]],
+                 int(ran.sum() - both.sum()), int(len(keys) - ran.sum()))
+
+
+def _incomplete_beta_fraction(a, b, x):
+    qab, qap, qam = a + b, a + 1, a - 1
+    c, d = 1, 1 - qab * x / qap
+    d = 1 / (d if abs(d) > BETA_TINY else BETA_TINY)
+    h = d
+    for m in range(1, BETA_ITERATIONS + 1):
+        m2 = 2 * m
+        for numerator in (m * (b - m) * x / ((qam + m2) * (a + m2)),
+                          -(a + m) * (qab + m) * x / ((a + m2) * (qap + m2))):
+            d = 1 + numerator * d
+            d = 1 / (d if abs(d) > BETA_TINY else BETA_TINY)
+            c = 1 + numerator / c
+            c = c if abs(c) > BETA_TINY else BETA_TINY
+            h *= d * c
+        if abs(d * c - 1) < BETA_EPSILON:
+            break
+    return h
+
+def incomplete_beta(a, b, x):
+    """
+    The regularized incomplete beta function I_x(a, b).
+    """
+    if x <= 0:
+        return 0.0
+    if x >= 1:
+        return 1.0
+    front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) +
+                     a * math.log(x) + b * math.log(1 - x))
+    # The continued fraction converges quickly only on this side
+    if x < (a + 1) / (a + b + 2):
+        return front * _incomplete_beta_fraction(a, b, x) / a
+    return 1 - front * _incomplete_beta_fraction(b, a, 1 - x) / b
+
+def t_cdf(t, dof):
+    """
+    Cumulative distribution function of Student's t distribution.
+    """
+    tail = 0.5 * incomplete_beta(dof / 2, 0.5, dof / (dof + t * t))
+    return 1 - tail if t > 0 else tail
+
+def t_ppf(p, dof):
+    """
+    Inverse of ``t_cdf``: the t value below which the given fraction of
+    the distribution lies.
+    """
+    if p == 0.5:
+        return 0.0
+    if p < 0.5:
+        return -t_ppf(1 - p, dof)
+    low, high = 0.0, 1.0
+    while t_cdf(high, dof) < p:
+        low, high = high, high * 2
+    for _ in range(100):
+        middle = (low + high) / 2
+        if t_cdf(middle, dof) < p:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+
+def sign_test(successes, trials):
+    """
+    Two-sided exact p-value of the sign test: the chance of a split of
+    ``trials`` at least as uneven as ``successes`` to the rest, were each
+    trial equally likely to go either way.
+    """
+    fewer = min(successes, trials - successes)
+    if 2 * fewer == trials:
+        return 1.0
+    # The binomial distribution's tail, P(X <= fewer) = I_1/2(n - k, k + 1)
+    return min(1.0, 2 * incomplete_beta(trials - fewer, fewer + 1, 0.5))
+
+def paired_t_test(a, b, confidence=DEFAULT_CONFIDENCE):
+    """
+    A paired t-test on the differences ``a - b`` of two arrays of at least
+    two matched durations. Returns a PairedTTest, with a two-sided p-value
+    and an interval for the mean difference at the given confidence.
+    """
+    n = len(a)
+    differences = a - b
+    mean_difference = float(differences.mean())
+    std_error = math.sqrt(float(differences.var(ddof=1)) / n)
+    dof = n - 1
+    margin = t_ppf(0.5 + confidence / 2, dof) * std_error
+    if std_error > 0:
+        t_value = mean_difference / std_error
+        p_value = 2 * (1 - t_cdf(abs(t_value), dof))
+    else:
+        t_value = math.copysign(float('inf'), mean_difference) if mean_difference else 0.0
+        p_value = 0.0 if mean_difference else 1.0
+    return PairedTTest(mean_difference, std_error,
+                       (mean_difference - margin, mean_difference + margin),
+                       t_value, p_value)
+
+def compare_paired(results, first, second, confidence=DEFAULT_CONFIDENCE):
+    """
+    Compare two controllers by a paired t-test on the differences of their
+    durations, ``first - second``, with timeouts counted at the time limit.
+    That can only understate how much slower a controller which timed out
+    was, so the seeds on which only one of them finished are put to
+    McNemar's test too. Returns a PairedComparison, or None if there are
+    fewer than two pairs.
+    """
+    pairs = paired_durations(results, first, second)
+    a, b = pairs.first, pairs.second
+    n = len(pairs.seeds)
+    if n < 2:
+        return None
+    test = paired_t_test(a, b, confidence)
+    only_first = int((pairs.first_finished & ~pairs.second_finished).sum())
+    only_second = int((pairs.second_finished & ~pairs.first_finished).sum())
+    difference_variance = test.std_error ** 2 * n
+    # Unpaired, the variance of a difference of means would be the sum of
+    # the two controllers' variances over the trials each
+    unpaired_variance = float(a.var(ddof=1) + b.var(ddof=1))
+    gain = (unpaired_variance / difference_variance if difference_variance > 0
+            else float('inf'))
+    censored = int((~pairs.first_finished | ~pairs.second_finished).sum())
+    return PairedComparison(first, second, n, pairs.errored, pairs.unpaired,
+                            test.mean_difference, test.std_error, test.interval,
+                            test.t_value, test.p_value, censored, only_first,
+                            only_second, sign_test(only_first, only_first + only_second),
+                            gain)
+
+def format_comparison(comparison, confidence=DEFAULT_CONFIDENCE):
+    c = comparison
+    lines = [
+        "{0} - {1}: {2:+.2f}s over {3} paired seeds ({4} left out with errors, "
+        "{5} unpaired)".format(c.first, c.second, c.mean_difference, c.pairs,
+                               c.errored, c.unpaired),
+        "  {0:.0%} interval [{1:+.2f}, {2:+.2f}], t = {3:.2f}, p = {4:.3g}"
+        .format(confidence, c.interval[0], c.interval[1], c.t_value, c.p_value),
+    ]
+    if c.censored:
+        lines.append("  timeouts, counted at the limit, in {0} of the pairs: only {1} "
+                     "finished on {2}, only {3} on {4}, McNemar p = {5:.3g}"
+                     .format(c.censored, c.first, c.only_first_finished, c.second,
+                             c.only_second_finished, c.outcome_p_value))
+    lines.append("  pairing gain {0:.2f}x: as precise as {1:.0f} unpaired trials per controller"
+                 .format(c.sample_size_gain, c.sample_size_gain * c.pairs))
+    return "\n".join(lines)
+
+
+def spent_alpha(fraction, alpha):
+    """
+    How much of ``alpha`` a sequential test may have spent once the given
+    fraction of its trials are in: the Pocock-type spending function of
+    Lan and DeMets, which spends early enough to stop early.
+    """
+    return alpha * math.log(1 + (math.e - 1) * min(fraction, 1))
+
+class SequentialTest(object):
+    """
+    A paired comparison of two controllers over at most ``seeds`` seeds,
+    tested again as results arrive, every ``look_pairs`` seeds completed by
+    both. Each look tests at the share of ``alpha`` spent since the last,
+    so however many looks are taken, the chance of finding a difference
+    which is not there stays within ``alpha``.
+
+    A look decides for a difference when its test rejects there being
+    none, or, given a ``margin`` in seconds, for equivalence when its
+    interval lies inside plus or minus the margin and no pair has a
+    timeout. Once any seed has been finished by only one controller, the
+    look's level is split between the t-test and McNemar's test of how
+    often each finishes, and either may decide. Once every seed is in, a
+    test left undecided has spent its budget.
+    """
+
+    def __init__(self, first, second, seeds, alpha=DEFAULT_ALPHA, margin=None,
+                 look_pairs=LOOK_PAIRS):
+        self.first = first
+        self.second = second
+        self.seeds = seeds
+        self.alpha = alpha
+        self.margin = margin
+        self.look_pairs = look_pairs
+        self.results = []
+        self.comparison = None
+        self.decision = None
+        self.completed = 0
+        self._controllers_by_seed = {}
+        self._looked_at = 0
+        self._spent = 0
+        self._level = alpha
+
+    def add(self, result):
+        """
+        Take in a result row, and return the decision if one has been
+        reached.
+        """
+        if self.decision is not None:
+            return self.decision
+        self.results.append(result)
+        done = self._controllers_by_seed.setdefault((result['config'], result['seed']), set())
+        done.add(result['controller'])
+        if done != set([self.first, self.second]):
+            return None
+        self.completed += 1
+        if (self.completed < self.seeds and
+                self.completed - self._looked_at < self.look_pairs):
+            return None
+        return self._look()
+
+    def _look(self):
+        self._looked_at = self.completed
+        spent = spent_alpha(self.completed / self.seeds, self.alpha)
+        level, self._spent = spent - self._spent, spent
+        comparison = compare_paired(Results.from_rows(self.results),
+                                    self.first, self.second, 1 - level)
+        if comparison is not None:
+            split = comparison.only_first_finished + comparison.only_second_finished > 0
+            if split:
+                # Two tests, each at half the level, together stay within it
+                level /= 2
+                comparison = compare_paired(Results.from_rows(self.results),
+                                            self.first, self.second, 1 - level)
+            self.comparison, self._level = comparison, level
+            low, high = comparison.interval
+            if comparison.p_value < level:
+                self.decision = (DECISION_FIRST_FASTER if comparison.mean_difference < 0
+                                 else DECISION_SECOND_FASTER)
+            elif split and comparison.outcome_p_value < level:
+                self.decision = (DECISION_FIRST_FASTER
+                                 if comparison.only_first_finished > comparison.only_second_finished
+                                 else DECISION_SECOND_FASTER)
+            elif (self.margin is not None and not comparison.censored and
+                    -self.margin < low and high < self.margin):
+                self.decision = DECISION_EQUIVALENT
+        if self.decision is None and self.completed >= self.seeds:
+            self.decision = DECISION_BUDGET_SPENT
+        return self.decision
+
+    def summary(self):
+        lines = ["{0} after {1} of {2} seeds"
+                 .format(self.decision or 'undecided', self.completed, self.seeds)]
+        if self.comparison is not None:
+            # The interval of the last look, at the level that look tested at
+            lines.append(format_comparison(self.comparison, 1 - self._level))
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('results', nargs='+',
+                        help="results files of batch.py, or controllers' time files")
+    parser.add_argument('--confidence', type=float, default=DEFAULT_CONFIDENCE)
+    parser.add_argument('--bins', type=int, default=0,
+                        help="print a histogram of each controller's durations")
+    parser.add_argument('--resamples', type=int, default=DEFAULT_RESAMPLES,
+                        help="bootstrap resamples; 0 for no bootstrap intervals")
+    parser.add_argument('--drop-outliers', action='store_true',
+                        help="leave outliers out of the comparisons")
+    parser.add_argument('--seed', type=int,
+                        help="seed of the bootstrap")
+    args = parser.parse_args()
+
+    results = Results.concatenate(read_results(path) for path in args.results)
+    rng = np.random.default_rng(args.seed)
+    succeeded = results.succeeded()
+    value_range = None
+    if succeeded.any():
+        value_range = (results.duration[succeeded].min(), results.duration[succeeded].max())
+    for name in results.controllers:
+        interval = None
+        mine = results.of(name)
+        durations = mine.duration[mine.succeeded()]
+        if args.resamples and len(durations):
+            interval = bootstrap_interval(durations, args.confidence, args.resamples, rng=rng)
+        print(format_summary(summarise(results, name), interval, args.confidence))
+        if args.bins and len(durations):
+            print(format_histogram(durations, args.bins, value_range))
+
+    if args.drop_outliers:
+        results = results.select(~outliers(results))
+    names = results.controllers
+    for other in names[1:]:
+        comparison = compare_paired(results, names[0], other, args.confidence)
+        if comparison is None:
+            print("{0} - {1}: fewer than two paired seeds".format(names[0], other))
+            continue
+        print(format_comparison(comparison, args.confidence))
+        if args.resamples:
+            pairs = paired_durations(results, names[0], other)
+            low, high = bootstrap_interval(pairs.first - pairs.second, args.confidence,
+                                           args.resamples, rng=rng)
+            print("  {0:.0%} bootstrap interval [{1:+.2f}, {2:+.2f}]"
+                  .format(args.confidence, low, high))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,338 @@
+"""
+Run many trials of the robot scripts in parallel and collect their results.
+
+Each trial runs headless on a virtual clock, with its own seed, in a
+process forked for it by a server which has already loaded the simulator
+and the scripts. Each produces one row of a CSV results file:
+
+    $ python3 batch.py -n 15 assignment_Mark.py assignment_Michal.py
+
+Every controller runs on the same seeds, so on the same layouts, and the
+batch ends by comparing them seed by seed as analysis.py does.
+
+This replaces the sequential loop in runtest.sh.
+"""
+
+from __future__ import division, print_function
+
+import argparse
+import csv
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import traceback
+
+import yaml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "sr/robot"))
+sys.path.append(os.path.join(HERE, "sr/robot/arenas"))
+
+from sr.robot import Simulator
+from sr.robot.runner import compile_script, start_robots
+
+from analysis import (OUTCOME_ERROR, OUTCOME_SUCCESS, OUTCOME_TIMEOUT, RESULT_COLUMNS,
+                      Results, SequentialTest, compare_paired, format_comparison)
+
+# Matches the `timeout 150s` that runtest.sh used to put on each run
+DEFAULT_TIME_LIMIT = 150
+
+
+class RobotsFinished(object):
+    """
+    Simulator observer which stops the simulation once no robot code is
+    left running.
+    """
+
+    def __init__(self, threads):
+        self.threads = threads
+
+    def update(self):
+        return any(thread.is_alive() for thread in self.threads)
+
+
+def read_reported_time(directory):
+    """
+    Return the task time a controller reported, or None.
+
+    The controllers report by appending their time to a text file in the
+    working directory. Each trial gets its own directory, so the last line
+    written there is this trial's.
+    """
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name)) as f:
+            lines = [line.strip() for line in f if line.strip()]
+        try:
+            return float(lines[-1])
+        except (IndexError, ValueError):
+            continue
+    return None
+
+
+def run_trial(trial):
+    """
+    Run a single trial in the current process and return its result row.
+    """
+    sim = Simulator(dict(trial['config']), background=False,
+                    headless=True, virtual_time=True, seed=trial['seed'])
+
+    completed_at = []
+    def on_interrupt(signum, frame):
+        # Controllers signal that they are done by interrupting their own process
+        completed_at.append(sim.clock.elapsed)
+        sim.stop()
+
+    previous_handler = signal.signal(signal.SIGINT, on_interrupt)
+    scratch = tempfile.mkdtemp(prefix='trial-')
+    cwd = os.getcwd()
+    os.chdir(scratch)
+    try:
+        threads = start_robots(sim, [trial['script']])
+        sim.attach_observer(RobotsFinished(threads))
+        sim.run(duration=trial['time_limit'])
+        reported = read_reported_time(scratch)
+    finally:
+        os.chdir(cwd)
+        signal.signal(signal.SIGINT, previous_handler)
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    if completed_at:
+        outcome = OUTCOME_SUCCESS
+        duration = reported if reported is not None else completed_at[0]
+    elif any(thread.exception is not None for thread in threads):
+        outcome = OUTCOME_ERROR
+        duration = sim.clock.elapsed
+    else:
+        outcome = OUTCOME_TIMEOUT
+        duration = sim.clock.elapsed
+
+    return {'trial': trial['trial'],
+            'controller': trial['controller'],
+            'seed': trial['seed'],
+            'outcome': outcome,
+            'duration': duration,
+            'host': socket.gethostname(),
+            'config': trial['config_name']}
+
+
+class ResultCollector(object):
+    """
+    Appends result rows to a CSV file as they arrive, writing the header if
+    the file is new. Only the parent process writes to it.
+    """
+
+    def __init__(self, path):
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, 'a')
+        self._writer = csv.DictWriter(self._file, RESULT_COLUMNS)
+        if is_new:
+            self._writer.writeheader()
+        self.results = []
+
+    def add(self, result):
+        self._writer.writerow(result)
+        self._file.flush()
+        self.results.append(result)
+
+    def close(self):
+        self._file.close()
+
+
+def controller_name(script):
+    return os.path.splitext(os.path.basename(script))[0]
+
+def make_trials(scripts, config_path, count, base_seed, time_limit):
+    """
+    Make ``count`` trials of each script, each seed shared by every script
+    so that their results pair up, with the scripts of a seed adjacent.
+    """
+    with open(config_path) as f:
+        config = yaml.safe_load(f)
+
+    trials = []
+    for i in range(count):
+        for script in scripts:
+            trials.append({'trial': i,
+                           'controller': controller_name(script),
+                           'script': os.path.abspath(script),
+                           'seed': base_seed + i,
+                           'config': config,
+                           'config_name': os.path.basename(config_path),
+                           'time_limit': time_limit})
+    return trials
+
+def failed_result(trial):
+    """
+    The result row for a trial whose process died before it could report.
+    """
+    return {'trial': trial['trial'],
+            'controller': trial['controller'],
+            'seed': trial['seed'],
+            'outcome': OUTCOME_ERROR,
+            'duration': float('nan'),
+            'host': socket.gethostname(),
+            'config': trial['config_name']}
+
+
+def serve_trials(trials, jobs, results):
+    """
+    Body of the fork server: fork a child for each trial, at most ``jobs``
+    at a time, and put each trial's result on the ``results`` queue.
+
+    This process has imported the simulator and compiled the robot scripts
+    already, and runs no threads of its own, so every child starts warm and
+    safe to fork, and nothing one trial leaves behind reaches the next.
+    """
+    for script in set(trial['script'] for trial in trials):
+        compile_script(script)
+    # The Box2D backend imports its engine only once asked for a world;
+    # imported here, every child has it already
+    import pypybox2d
+
+    running = {}
+
+    def kill_children(signum, frame):
+        for pid in running:
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except OSError:
+                pass
+        os._exit(1)
+    signal.signal(signal.SIGTERM, kill_children)
+
+    def reap():
+        pid, status = os.wait()
+        trial = running.pop(pid)
+        if status != 0:
+            results.put(failed_result(trial))
+
+    for trial in trials:
+        if len(running) == jobs:
+            reap()
+        pid = os.fork()
+        if pid == 0:
+            # Killing the children is the server's business, not theirs
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                results.put(run_trial(trial))
+            except BaseException:
+                traceback.print_exc()
+                os._exit(1)
+            os._exit(0)
+        running[pid] = trial
+    while running:
+        reap()
+
+
+def forked_results(trials, jobs):
+    """
+    Run trials from a warm fork server, yielding each result as it arrives.
+    """
+    results = multiprocessing.SimpleQueue()
+    server = multiprocessing.Process(target=serve_trials,
+                                     args=(trials, jobs or multiprocessing.cpu_count(),
+                                           results))
+    server.start()
+    received = 0
+    try:
+        while received < len(trials):
+            result = results.get()
+            received += 1
+            yield result
+    finally:
+        # Stopped early: the server would otherwise run the remaining trials
+        if received < len(trials):
+            server.terminate()
+        server.join()
+
+
+def pooled_results(trials, jobs):
+    """
+    Run trials over a pool of worker processes, for platforms without fork.
+    """
+    # A fresh process per trial, so robot threads left behind by a
+    # finished trial cannot leak into the next one
+    pool = multiprocessing.Pool(jobs, maxtasksperchild=1)
+    try:
+        for result in pool.imap_unordered(run_trial, trials):
+            yield result
+    except BaseException:
+        pool.terminate()
+        raise
+    else:
+        pool.close()
+    finally:
+        pool.join()
+
+
+def run_batch(trials, collector, jobs=None, report=print, stop=None):
+    """
+    Run trials in parallel, passing each result to the collector as it
+    finishes.
+
+    ``stop``, if given, is called with each result too, and returns true
+    once no more trials are wanted: none are started after that, and any
+    still running are abandoned.
+    """
+    results = (forked_results if hasattr(os, 'fork') else pooled_results)(trials, jobs)
+    try:
+        for done, result in enumerate(results, 1):
+            collector.add(result)
+            report("[{0}/{1}] {controller} seed={seed}: {outcome} in {duration:.2f}s"
+                   .format(done, len(trials), **result))
+            if stop is not None and stop(result):
+                break
+    finally:
+        results.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('robot_scripts', nargs='+')
+    parser.add_argument('-c', '--config', default='games/two_colours_assignment.yaml')
+    parser.add_argument('-n', '--trials', type=int, default=15,
+                        help="number of trials per robot script")
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="seed of the first trial; later trials count up from it")
+    parser.add_argument('-t', '--time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help="simulated seconds after which a trial fails")
+    parser.add_argument('-o', '--output', default='results.csv')
+    parser.add_argument('--sequential', action='store_true',
+                        help="stop as soon as the two robot scripts are told apart, "
+                             "running at most --trials trials of each")
+    parser.add_argument('--margin', type=float,
+                        help="with --sequential, also stop once they are shown to "
+                             "differ by less than this many seconds")
+    args = parser.parse_args()
+    names = [controller_name(script) for script in args.robot_scripts]
+    if args.sequential and len(names) != 2:
+        parser.error("--sequential compares exactly two robot scripts")
+
+    trials = make_trials(args.robot_scripts, args.config, args.trials,
+                         args.seed, args.time_limit)
+    test = None
+    if args.sequential:
+        test = SequentialTest(names[0], names[1], args.trials, margin=args.margin)
+    collector = ResultCollector(args.output)
+    try:
+        run_batch(trials, collector, args.jobs, stop=test.add if test else None)
+    finally:
+        collector.close()
+
+    if test is not None:
+        print(test.summary())
+        return
+    results = Results.from_rows(collector.results)
+    for other in names[1:]:
+        comparison = compare_paired(results, names[0], other)
+        if comparison is not None:
+            print(format_comparison(comparison))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Measure how far the faster physics profiles stray from the reference one,
+by running the same trials under each:
+
+    $ python3 compare_profiles.py -n 8 assignment_Mark.py assignment_Michal.py
+
+For each profile, prints how many trials ended as they did under the
+reference (in success or timeout), each controller's median completion
+time against the reference's, and how long the batch took.
+"""
+
+from __future__ import division, print_function
+
+import argparse
+import multiprocessing
+import time
+
+import numpy as np
+
+from analysis import OUTCOME_SUCCESS
+from batch import DEFAULT_TIME_LIMIT, controller_name, make_trials, run_batch
+from sr.robot.physics import DEFAULT_PROFILE, PROFILES
+
+
+class ProfileResults(object):
+    """
+    Collects a batch's results by controller and seed.
+    """
+
+    def __init__(self):
+        self.results = {}
+
+    def add(self, result):
+        self.results[(result['controller'], result['seed'])] = result
+
+
+def run_profile(trials, profile, jobs):
+    for trial in trials:
+        trial['config'] = dict(trial['config'], physics_profile=profile)
+    collector = ProfileResults()
+    start = time.time()
+    run_batch(trials, collector, jobs, report=lambda line: None)
+    return collector.results, time.time() - start
+
+def median_duration(results, controller):
+    durations = [result['duration'] for (name, _), result in results.items()
+                 if name == controller and result['outcome'] == OUTCOME_SUCCESS]
+    return np.median(durations) if durations else float('nan')
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('robot_scripts', nargs='+')
+    parser.add_argument('-c', '--config', default='games/two_colours_assignment.yaml')
+    parser.add_argument('-n', '--trials', type=int, default=8,
+                        help="number of trials per robot script")
+    parser.add_argument('-j', '--jobs', type=int, default=multiprocessing.cpu_count(),
+                        help="number of worker processes")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="seed of the first trial; later trials count up from it")
+    parser.add_argument('-t', '--time-limit', type=float, default=DEFAULT_TIME_LIMIT,
+                        help="simulated seconds after which a trial fails")
+    parser.add_argument('-p', '--profiles', nargs='+',
+                        default=sorted(set(PROFILES) - set([DEFAULT_PROFILE])),
+                        help="profiles to compare with the reference")
+    args = parser.parse_args()
+    names = [controller_name(script) for script in args.robot_scripts]
+
+    def trials():
+        return make_trials(args.robot_scripts, args.config, args.trials,
+                           args.seed, args.time_limit)
+
+    reference, elapsed = run_profile(trials(), DEFAULT_PROFILE, args.jobs)
+    print("{0}: {1:.0f}s".format(DEFAULT_PROFILE, elapsed))
+    for profile in args.profiles:
+        results, elapsed = run_profile(trials(), profile, args.jobs)
+        same = sum(result['outcome'] == reference[key]['outcome']
+                   for key, result in results.items())
+        print("{0}: {1:.0f}s, same outcome in {2} of {3} trials"
+              .format(profile, elapsed, same, len(results)))
+        for name in names:
+            expected = median_duration(reference, name)
+            median = median_duration(results, name)
+            print("  {0}: median {1:.2f}s against {2:.2f}s ({3:+.1%})"
+                  .format(name, median, expected, median / expected - 1))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,49 @@
+"""
+Generate a bank of scenarios for a game config, so that trials load their
+layouts from it rather than drawing them:
+
+    $ python3 make_scenarios.py -n 1000 -o banks/two_colours_assignment.npz
+
+Then name the bank in the game config, and every trial starts from the
+scenario numbered by its seed:
+
+    scenarios: banks/two_colours_assignment.npz
+"""
+
+from __future__ import division, print_function
+
+import argparse
+import os
+import sys
+import time
+
+import yaml
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(HERE, "sr/robot"))
+sys.path.append(os.path.join(HERE, "sr/robot/arenas"))
+
+from sr.robot.scenario_bank import generate_bank
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('-c', '--config', default='games/two_colours_assignment.yaml')
+    parser.add_argument('-n', '--scenarios', type=int, default=1000,
+                        help="number of scenarios to generate")
+    parser.add_argument('-s', '--seed', type=int, default=0,
+                        help="seed of the first scenario; later ones count up from it")
+    parser.add_argument('-o', '--output', required=True)
+    args = parser.parse_args()
+
+    with open(args.config) as f:
+        config = yaml.safe_load(f)
+    start = time.time()
+    bank = generate_bank(config, args.scenarios, args.seed)
+    bank.save(args.output)
+    print("{0} scenarios of {1} objects in {2:.1f}s, {3} bytes"
+          .format(len(bank), bank.poses.shape[1], time.time() - start,
+                  os.path.getsize(args.output)))
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,7 @@
 import yaml
-import threading
 import argparse
 import sys
+import threading
 
 from functools import reduce
 
@@ -9,11 +9,21 @@ sys.path.append("sr/robot")
 sys.path.append("sr/robot/arenas")
 
 from sr.robot import *
+from sr.robot.runner import start_robots
 
 parser = argparse.ArgumentParser()
 parser.add_argument('-c', '--config',
                     type=argparse.FileType('r'),
                     default='games/two_colours_assignment.yaml')
+parser.add_argument('--headless',
+                    action='store_true',
+                    help="run without opening a pygame window")
+parser.add_argument('--virtual-time',
+                    action='store_true',
+                    help="run robot code on a simulated clock, as fast as possible")
+parser.add_argument('--processes',
+                    action='store_true',
+                    help="run each robot script in a process of its own")
 parser.add_argument('robot_scripts',
                     type=argparse.FileType('r'),
                     nargs='*')
@@ -31,39 +41,20 @@ while not robot_scripts:
     robot_scripts = [read_file(s.strip()) for s in robot_script_names]
 
 with args.config as f:
-    config = yaml.load(f)
-
-sim = Simulator(config, background=False)
-
-class RobotThread(threading.Thread):
-    def __init__(self, zone, script, *args, **kwargs):
-        super(RobotThread, self).__init__(*args, **kwargs)
-        self.zone = zone
-        self.script = script.name
-        self.daemon = True
-
-    def run(self):
-        def robot():
-            with sim.arena.physics_lock:
-                robot_object = SimRobot(sim)
-                robot_object.zone = self.zone
-                robot_object.location = sim.arena.start_locations[self.zone]
-                robot_object.heading = sim.arena.start_headings[self.zone]
-                return robot_object
+    config = yaml.safe_load(f)
 
-        exec(open(self.script).read(), {'Robot': robot})
+sim = Simulator(config, background=False, headless=args.headless,
+                virtual_time=args.virtual_time)
 
-threads = []
-for zone, robot in enumerate(robot_scripts):
-    thread = RobotThread(zone, robot)
-    thread.start()
-    threads.append(thread)
+runners = start_robots(sim, [script.name for script in robot_scripts],
+                       processes=args.processes)
 
 sim.run()
+sim.close()
 
 # Warn PyScripter users that despite the exit of the main thread, the daemon
 # threads won't actually have gone away. See commit 8cad7add for more details.
-threads = [t for t in threads if t.is_alive()]
+threads = [t for t in runners if isinstance(t, threading.Thread) and t.is_alive()]
 if threads:
     print("WARNING: {0} robot code threads still active.".format(len(threads)))
     #####                                                               #####
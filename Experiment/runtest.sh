@@ -1,11 +1,4 @@
 #!/bin/bash
 
-for i in {1..15}
-do
-	echo $i
-	timeout -s SIGINT 150s python3 run.py assignment_Michal.py
-	exit_status=$?
-	if [[ $exit_status -eq 124 ]]; then
-		echo "Fail" >> MichalProgramTime.txt
-	fi
-done
+# Trials now run in parallel through batch.py; see `python3 batch.py --help`
+python3 batch.py -n 15 -o MichalResults.csv assignment_Michal.py "$@"
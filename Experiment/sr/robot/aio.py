@@ -0,0 +1,166 @@
+"""
+asyncio flavour of the robot API, for scripts defining ``async def main(R)``.
+
+Every such script in a simulation shares one event loop, whose time is the
+simulator's clock and which the simulator runs after every physics tick.
+This module needs Python 3.5 or later, so it is only imported when an
+async script is found.
+"""
+
+import asyncio
+import traceback
+
+class SimEventLoop(asyncio.SelectorEventLoop):
+    """
+    An event loop which tells the time by a simulator clock, so that
+    ``asyncio.sleep`` waits in simulated time. It never blocks: the
+    simulator calls ``run_pending`` once per tick instead of ``run_forever``.
+    """
+
+    def __init__(self, clock):
+        super().__init__()
+        self._clock = clock
+        # asyncio offers no public way to look into a loop's queues, so
+        # this reads BaseEventLoop's private ``_ready`` deque and
+        # ``_scheduled`` heap of TimerHandles. Fail here, rather than
+        # have timers quietly run late, should they ever go.
+        if not (hasattr(self, '_ready') and hasattr(self, '_scheduled')):
+            raise RuntimeError("This version of asyncio has no _ready and "
+                               "_scheduled queues for SimEventLoop to read")
+
+    def time(self):
+        return self._clock.elapsed
+
+    def next_timer(self):
+        """
+        Return when the earliest timer not cancelled is due, or None.
+        """
+        return min((handle.when() for handle in self._scheduled
+                    if not handle.cancelled()), default=None)
+
+    def _has_pending(self):
+        if self._ready:
+            return True
+        return bool(self._scheduled) and self._scheduled[0].when() <= self.time()
+
+    def run_pending(self):
+        """
+        Run callbacks until every task is waiting for a later time.
+        """
+        while True:
+            self.call_soon(self.stop)
+            self.run_forever()
+            if not self._has_pending():
+                break
+
+
+class AsyncRobot(object):
+    """
+    Wraps a SimRobot with coroutine methods. The motors and pose are read
+    and written directly, as they never block.
+    """
+
+    def __init__(self, robot):
+        self._robot = robot
+
+    @property
+    def motors(self):
+        return self._robot.motors
+
+    @property
+    def zone(self):
+        return self._robot.zone
+
+    @property
+    def location(self):
+        return self._robot.location
+
+    @property
+    def heading(self):
+        return self._robot.heading
+
+    async def see(self, res=(800, 600)):
+        return self._robot.see(res)
+
+    async def grab(self):
+        return self._robot.grab()
+
+    async def release(self):
+        return self._robot.release()
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(seconds)
+
+    async def drive(self, speed, seconds):
+        """
+        Drive straight at the given power for some time, then stop.
+        """
+        motor = self.motors[0]
+        motor.m0.power = motor.m1.power = speed
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            motor.m0.power = motor.m1.power = 0
+
+    async def turn(self, speed, seconds):
+        """
+        Turn on the spot at the given power for some time, then stop.
+        """
+        motor = self.motors[0]
+        motor.m0.power, motor.m1.power = speed, -speed
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            motor.m0.power = motor.m1.power = 0
+
+
+class AsyncScheduler(object):
+    """
+    Simulator controller running the shared event loop after each tick.
+    """
+
+    def __init__(self, simulator):
+        self.loop = SimEventLoop(simulator.clock)
+
+    def step(self, time_passed):
+        self.loop.run_pending()
+
+    def next_deadline(self):
+        return self.loop.next_timer()
+
+    def close(self):
+        if self.loop.is_closed():
+            return
+        tasks = asyncio.all_tasks(self.loop)
+        for task in tasks:
+            task.cancel()
+        self.loop.run_pending()
+        self.loop.close()
+
+
+class AsyncController(object):
+    """
+    Runs one async robot script's ``main(R)`` as a task on the scheduler's
+    event loop.
+    """
+
+    def __init__(self, scheduler, robot, main):
+        self.robot = AsyncRobot(robot)
+        self.task = scheduler.loop.create_task(main(self.robot))
+        self.task.add_done_callback(self._report)
+
+    @staticmethod
+    def _report(task):
+        if not task.cancelled() and task.exception() is not None:
+            exception = task.exception()
+            traceback.print_exception(type(exception), exception,
+                                      exception.__traceback__)
+
+    def is_alive(self):
+        return not self.task.done()
+
+    @property
+    def exception(self):
+        if self.task.done() and not self.task.cancelled():
+            return self.task.exception()
+        return None
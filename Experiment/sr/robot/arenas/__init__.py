@@ -6,6 +6,7 @@ from .abc_arena import ABCArena
 from .caldera_arena import CalderaArena
 from .two_colours_arena import TwoColoursArena
 from .two_colours_assignment_arena import TwoColoursAssignmentArena
+from .procedural_arena import ProceduralArena
 
 __all__ = [
     'pirate_plunder_arena',
@@ -15,5 +16,6 @@ __all__ = [
     'two_colours_assignment_arena',
     'abc_arena',
     'caldera_arena',
+    'procedural_arena',
     'arena',
 ]
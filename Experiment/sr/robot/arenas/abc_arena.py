@@ -31,8 +31,8 @@ class ABCArena(Arena):
     starting_zone_side = 1
     scoring_zone_side = 2
 
-    def __init__(self, objects=None, wall_markers=True):
-        super(ABCArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=True, **kwargs):
+        super(ABCArena, self).__init__(objects, wall_markers, **kwargs)
 
         # Positions are top-to-bottom, left-to-right
         positions = token_positions(separation=1.5)
@@ -49,8 +49,8 @@ class ABCArena(Arena):
         ]
 
         for pos, (marker_type, offset) in zip(positions, token_types):
-            token = Token(self, offset, damping=10, marker_type=marker_type)
-            token.location = pos
+            token = Token(self, offset, damping=10, marker_type=marker_type,
+                          location=pos)
             self.objects.append(token)
 
     def draw_background(self, surface, display):
@@ -2,17 +2,19 @@ from __future__ import division
 
 from math import pi
 
-import pygame
-
-from display import get_surface
 from markers import WallMarker
+from object_state import ObjectState
+from physics import DEFAULT_PHYSICS, DEFAULT_PROFILE, create_physics
+from spatial import SpatialGrid
 
+import random
 import threading
 
-import pypybox2d
-
 MARKERS_PER_WALL = 7
 
+# Side of the cells objects are bucketed into for vision and grabbing queries
+SPATIAL_INDEX_CELL_SIZE = 0.5
+
 ARENA_FLOOR_COLOR = (0x12, 0x2B, 0x5E)
 ARENA_MARKINGS_COLOR = (0xD0, 0xD0, 0xD0)
 ARENA_MARKINGS_WIDTH = 3
@@ -46,6 +48,7 @@ def draw_corner_zones(arena, display, surface, shape='Triangular'):
     """
     Draw corner zones for the given arena onto the given display.
     """
+    import pygame
 
     def get_coord(x, y):
         return display.to_pixel_coord((x, y), arena)
@@ -137,48 +140,84 @@ class Arena(object):
         self._populate_wall(left = (self.left, self.top), right = (self.right, self.top),
                             count = MARKERS_PER_WALL, start = 0, angle = 3*pi / 2)
 
-    def _init_physics(self):
-        self._physics_world = pypybox2d.world.World(gravity=(0, 0))
+    def _init_physics(self, physics, profile):
+        bounds = (self.left, self.right, self.top, self.bottom)
+        if hasattr(physics, 'recycle') and physics.bounds == bounds:
+            # The backend of an earlier arena of the same size: build on
+            # its world and walls, and reuse its bodies
+            physics.recycle(profile)
+            self.physics = physics
+        else:
+            if hasattr(physics, 'recycle'):
+                # Its walls are in the wrong place; start a new world
+                physics = physics.name
+            self.physics = create_physics(physics, self.left, self.right,
+                                          self.top, self.bottom, profile)
         # Global lock for simulation
         self.physics_lock = threading.RLock()
-        # Create the arena wall
-        WALL_WIDTH = 2
-        WALL_SETTINGS = {'restitution': 0.2, 'friction': 0.3}
-
-        wall_right = self._physics_world.create_body(position=(self.right, 0),
-                                                     type=pypybox2d.body.Body.STATIC)
-        wall_right.create_polygon_fixture([(WALL_WIDTH, self.top - WALL_WIDTH),
-                                           (WALL_WIDTH, self.bottom + WALL_WIDTH),
-                                           (0, self.bottom + WALL_WIDTH),
-                                           (0, self.top - WALL_WIDTH)],
-                                          **WALL_SETTINGS)
-
-        wall_left = self._physics_world.create_body(position=(self.left, 0),
-                                                    type=pypybox2d.body.Body.STATIC)
-        wall_left.create_polygon_fixture([(-WALL_WIDTH, self.top - WALL_WIDTH),
-                                          (0, self.top - WALL_WIDTH),
-                                          (0, self.bottom + WALL_WIDTH),
-                                          (-WALL_WIDTH, self.bottom + WALL_WIDTH)],
-                                         **WALL_SETTINGS)
-
-        wall_top = self._physics_world.create_body(position=(0, self.top),
-                                                   type=pypybox2d.body.Body.STATIC)
-        wall_top.create_polygon_fixture([(self.left, 0),
-                                         (self.left, -WALL_WIDTH),
-                                         (self.right, -WALL_WIDTH),
-                                         (self.right, 0)],
-                                        **WALL_SETTINGS)
-
-        wall_bottom = self._physics_world.create_body(position=(0, self.bottom),
-                                                   type=pypybox2d.body.Body.STATIC)
-        wall_bottom.create_polygon_fixture([(self.left, 0),
-                                            (self.right, 0),
-                                            (self.right, WALL_WIDTH),
-                                            (self.left, WALL_WIDTH)],
-                                           **WALL_SETTINGS)
-
-    def __init__(self, objects=None, wall_markers=True):
-        self._init_physics()
+
+    def _object_position(self, obj):
+        # Read bodies directly: going through a robot's location property
+        # would take its lock, which must not be taken under physics_lock
+        body = getattr(obj, '_body', None)
+        return body.position if body is not None else obj.location
+
+    def _object_heading(self, obj):
+        body = getattr(obj, '_body', None)
+        return body.angle if body is not None else obj.heading
+
+    def _object_velocity(self, obj):
+        body = getattr(obj, '_body', None)
+        return body.linear_velocity if body is not None else (0, 0)
+
+    def _index_new_objects(self):
+        if len(self.objects) == self._indexed_count:
+            return
+        with self.physics_lock:
+            for obj in self.objects[self._indexed_count:]:
+                self._spatial_index.insert(obj, self._object_position(obj))
+                body = getattr(obj, '_body', None)
+                if body is not None and not body.static:
+                    self._moving_objects.append(obj)
+                if hasattr(obj, 'tick'):
+                    self._tickable_objects.append(obj)
+            self._indexed_count = len(self.objects)
+            self._object_state = ObjectState.build(self.objects,
+                                                   self._object_position,
+                                                   self._object_heading,
+                                                   self._object_velocity)
+
+    def _update_indexes(self):
+        changes = []
+        awake = set()
+        for obj in self._moving_objects:
+            body = obj._body
+            if body.awake:
+                awake.add(obj)
+                self._spatial_index.update(obj, body.position)
+            elif obj not in self._awake_objects:
+                continue
+            # Bodies which have just gone to sleep still need their
+            # velocity zeroed in the snapshot
+            changes.append((obj, body.position, body.angle, body.linear_velocity))
+        self._awake_objects = awake
+        if changes:
+            self._object_state = self._object_state.updated(changes)
+
+    def __init__(self, objects=None, wall_markers=True, physics=DEFAULT_PHYSICS,
+                 physics_profile=DEFAULT_PROFILE, seed=None):
+        # Layouts are drawn from here: a generator of their own if seeded,
+        # as the simulator does for each trial, or else the shared one
+        self.random = random.Random(seed) if seed is not None else random
+        self._spatial_index = SpatialGrid(SPATIAL_INDEX_CELL_SIZE)
+        self._indexed_count = 0
+        self._moving_objects = []
+        self._awake_objects = set()
+        self._tickable_objects = []
+        self._object_state = ObjectState.build([], None, None, None)
+        # Counts physics steps, so that cameras know when the world has changed
+        self.tick_count = 0
+        self._init_physics(physics, physics_profile)
         self.objects = objects if objects is not None else []
         if wall_markers:
             self._populate_wall_markers()
@@ -193,16 +232,58 @@ class Arena(object):
         else:
             return True, None, None
 
+    def object_moved(self, obj):
+        """
+        Tell the arena an object was moved other than by the physics step.
+        """
+        with self.physics_lock:
+            if obj in self._spatial_index:
+                location = self._object_position(obj)
+                self._spatial_index.update(obj, location)
+                self._object_state = self._object_state.updated(
+                    [(obj, location, self._object_heading(obj),
+                      self._object_velocity(obj))])
+
+    def object_state(self):
+        """
+        Return the latest ObjectState snapshot of every object, as of the
+        end of the last tick. Snapshots are published whole and never
+        modified, so they can be read from any thread without locking.
+        """
+        self._index_new_objects()
+        return self._object_state
+
+    def objects_near(self, x, y, radius):
+        """
+        Return candidate objects within ``radius`` of the given point, in
+        the order they appear in ``objects``. Callers must still check the
+        exact distance.
+        """
+        self._index_new_objects()
+        return self._spatial_index.near(x, y, radius)
+
+    def next_time_step(self, base_step):
+        """
+        How long the next physics step should be, given the simulator's
+        physics step; the physics profile may lengthen or shorten it.
+        """
+        with self.physics_lock:
+            return self.physics.next_time_step(base_step)
+
     def tick(self, time_passed):
+        self._index_new_objects()
         with self.physics_lock:
-            self._physics_world.step(time_passed,
-                                     vel_iters=8,
-                                     pos_iters=3)
-        for obj in self.objects:
-            if hasattr(obj, "tick"):
-                obj.tick(time_passed)
+            self.physics.step(time_passed)
+            self._update_indexes()
+            self.tick_count += 1
+            # Idle objects are left alone so their bodies can go to sleep,
+            # after which the physics step skips them too
+            for obj in self._tickable_objects:
+                if not obj.idle:
+                    obj.tick(time_passed)
 
     def draw_motif(self, surface, display):
+        from display import get_surface
         # Motif
         motif = get_surface(self.motif_name)
         x, y = display.to_pixel_coord((0, 0), self)
@@ -2,8 +2,6 @@ from __future__ import division
 
 from math import ceil, cos, pi, sin
 
-import pygame
-
 from .arena import ARENA_FLOOR_COLOR, ARENA_MARKINGS_COLOR, ARENA_MARKINGS_WIDTH, Arena, draw_corner_zones
 from ..markers import Token
 
@@ -26,8 +24,8 @@ class CalderaArena(Arena):
                       -0.75 * pi,
                       -0.25 * pi]
 
-    def __init__(self, objects=None, wall_markers=True):
-        super(CalderaArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=True, **kwargs):
+        super(CalderaArena, self).__init__(objects, wall_markers, **kwargs)
         self._init_tokens()
 
     def _init_tokens(self):
@@ -42,11 +40,13 @@ class CalderaArena(Arena):
         for zone in range(0, 4):
             for i, location in enumerate(token_locations_offsets_from_zone):
                 rotated_location = rotate(location[0] - 4, location[1] - 4, (pi / 2) * zone)
-                token = Token(self, token_ids[zone], damping=10)
-                token.location = rotated_location
+                token = Token(self, token_ids[zone], damping=10,
+                              location=rotated_location)
                 self.objects.append(token)
 
     def draw_background(self, surface, display):
+        import pygame
+
         super(CalderaArena, self).draw_background(surface, display)
 
         def line(start, end):
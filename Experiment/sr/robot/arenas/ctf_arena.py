@@ -1,6 +1,5 @@
 from __future__ import division
 
-import pygame
 from math import pi
 
 from .arena import Arena, ARENA_MARKINGS_COLOR, ARENA_MARKINGS_WIDTH
@@ -8,8 +7,6 @@ from .arena import Arena, ARENA_MARKINGS_COLOR, ARENA_MARKINGS_WIDTH
 from ..markers import Token
 from ..game_object import GameObject
 
-import pypybox2d
-
 class CTFWall(GameObject):
     @property
     def location(self):
@@ -20,6 +17,7 @@ class CTFWall(GameObject):
         if self._body is None:
             return # Slight hack: deal with the initial setting from the constructor
         self._body.position = new_pos
+        self.arena.object_moved(self)
 
     @property
     def heading(self):
@@ -30,18 +28,17 @@ class CTFWall(GameObject):
         if self._body is None:
             return # Slight hack: deal with the initial setting from the constructor
         self._body.angle = _new_heading
+        self.arena.object_moved(self)
 
-    def __init__(self, arena):
-        self._body = arena._physics_world.create_body(position=(0, 0),
-                                                      angle=0,
-                                                      type=pypybox2d.body.Body.STATIC)
-        self._body.create_polygon_fixture([(-0.75, -0.15),
-                                           ( 0.75, -0.15),
-                                           ( 0.75,  0.15),
-                                           (-0.75,  0.15)],
-                                          restitution=0.2,
-                                          friction=0.3)
+    def __init__(self, arena, location=(0,0), heading=0):
+        self._body = None
         super(CTFWall, self).__init__(arena)
+        self._body = arena.physics.create_body((0.75, 0.15),
+                                               static=True,
+                                               restitution=0.2,
+                                               friction=0.3,
+                                               position=location,
+                                               angle=heading)
 
     surface_name = 'sr/wall.png'
 
@@ -56,8 +53,8 @@ class CTFArena(Arena):
                       -0.75*pi,
                       -0.25*pi]
 
-    def __init__(self, objects=None, wall_markers=True, zone_flags=True):
-        super(CTFArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=True, zone_flags=True, **kwargs):
+        super(CTFArena, self).__init__(objects, wall_markers, **kwargs)
         self._init_walls()
         self._init_tokens(zone_flags)
 
@@ -72,9 +69,7 @@ class CTFArena(Arena):
             token_locations = [(0, 0)]
 
         for i, location in enumerate(token_locations):
-            token = Token(self, i, damping=0.5)
-            token.location = location
-            token.heading = pi/4
+            token = Token(self, i, damping=0.5, location=location, heading=pi/4)
             self.objects.append(token)
 
     def _init_walls(self):
@@ -83,12 +78,12 @@ class CTFArena(Arena):
                          (0, 2.25, pi/2),
                          (0, -2.25, pi/2)]
         for x, y, rotation in wall_settings:
-            wall = CTFWall(self)
-            wall.location = (x, y)
-            wall.heading = rotation
+            wall = CTFWall(self, location=(x, y), heading=rotation)
             self.objects.append(wall)
 
     def draw_background(self, surface, display):
+        import pygame
+
         super(CTFArena, self).draw_background(surface, display)
 
         def line(start, end):
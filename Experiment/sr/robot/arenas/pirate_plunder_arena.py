@@ -1,8 +1,6 @@
 from __future__ import division
 
-import pygame
 from math import pi
-from random import random
 
 from .arena import Arena, ARENA_MARKINGS_COLOR, ARENA_MARKINGS_WIDTH
 
@@ -21,15 +19,17 @@ class PiratePlunderArena(Arena):
 
     zone_size = 1
 
-    def __init__(self, objects=None, wall_markers=True, num_tokens=5):
-        super(PiratePlunderArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=True, num_tokens=5, **kwargs):
+        super(PiratePlunderArena, self).__init__(objects, wall_markers, **kwargs)
 
         for i in range(num_tokens):
-            token = Token(self, i, damping=10)
-            token.location = (random() * 4 - 2, random() * 4 - 2)
+            location = (self.random.random() * 4 - 2, self.random.random() * 4 - 2)
+            token = Token(self, i, damping=10, location=location)
             self.objects.append(token)
 
     def draw_background(self, surface, display):
+        import pygame
+
         super(PiratePlunderArena, self).draw_background(surface, display)
 
         # Corners of the inside square
@@ -0,0 +1,94 @@
+from __future__ import division
+
+from math import atan2, cos, hypot, pi, sin
+
+from .arena import Arena
+from .ctf_arena import CTFWall
+from .two_colours_assignment_arena import GoldToken, SilverToken
+from ..spatial import DiscSampler
+from ..vision import MARKER_TOKEN_GOLD, MARKER_TOKEN_SILVER, marker_offsets
+
+# Tokens are 0.18m square; a disc this size covers one at any heading
+TOKEN_RADIUS = hypot(0.09, 0.09)
+# Walls are 1.5m by 0.3m, covered by a row of discs each over a 0.3m square
+WALL_DISCS = [(offset, 0, hypot(0.15, 0.15)) for offset in (-0.6, -0.3, 0, 0.3, 0.6)]
+# Kept clear around each starting location, enough for a robot to turn
+START_RADIUS = 0.5
+# Starting locations are this far in from the walls
+START_INSET = 0.5
+# Extra space left between any two placed objects
+CLEARANCE = 0.05
+
+# Random locations tried for each object before giving up
+PLACEMENT_ATTEMPTS = 1000
+
+TOKEN_MARKER_TYPES = {GoldToken: MARKER_TOKEN_GOLD, SilverToken: MARKER_TOKEN_SILVER}
+# Tokens of both colours take codes from one sequence starting here. Each
+# colour's offsets start only a few codes after the other's, so numbering
+# them separately would give gold and silver tokens the same codes
+FIRST_TOKEN_CODE = max(marker_offsets[marker_type]
+                       for marker_type in TOKEN_MARKER_TYPES.values())
+
+
+class ProceduralArena(Arena):
+    """
+    An arena generated from its options, for benchmarking at scale: a
+    ``size`` of the given width and height, ``tokens`` tokens of which
+    ``silver_fraction`` are silver and the rest gold, ``obstacles`` walls
+    like those of CTF at random headings, and ``robots`` starting
+    locations spaced around the edge, facing the centre.
+
+    Nothing overlaps, and no two tokens share a marker code; a ValueError
+    is raised if everything cannot be fitted into the arena.
+    """
+
+    def __init__(self, objects=None, wall_markers=True, size=(8, 8), tokens=20,
+                 silver_fraction=0.5, obstacles=0, robots=4, **kwargs):
+        self.size = tuple(size)
+        self.start_locations, self.start_headings = self._start_poses(robots)
+        super(ProceduralArena, self).__init__(objects, wall_markers, **kwargs)
+
+        sampler = DiscSampler(self.left, self.top, self.right, self.bottom,
+                              cell_size=2 * (TOKEN_RADIUS + CLEARANCE),
+                              rng=self.random)
+        for x, y in self.start_locations:
+            sampler.add(x, y, START_RADIUS)
+
+        for i in range(obstacles):
+            heading = self.random.uniform(0, pi)
+            discs = [(cos(heading) * offset, sin(heading) * offset, radius + CLEARANCE)
+                     for offset, _, radius in WALL_DISCS]
+            location = sampler.place(discs, PLACEMENT_ATTEMPTS)
+            if location is None:
+                raise ValueError("Could not fit {0} obstacles into the arena"
+                                 .format(obstacles))
+            wall = CTFWall(self, location=location, heading=heading)
+            self.objects.append(wall)
+
+        silver = int(round(tokens * silver_fraction))
+        token_types = [SilverToken] * silver + [GoldToken] * (tokens - silver)
+        self.random.shuffle(token_types)
+        discs = [(0, 0, TOKEN_RADIUS + CLEARANCE)]
+        for code, token_type in enumerate(token_types, FIRST_TOKEN_CODE):
+            location = sampler.place(discs, PLACEMENT_ATTEMPTS)
+            if location is None:
+                raise ValueError("Could not fit {0} tokens into a {1}x{2} arena"
+                                 .format(tokens, *self.size))
+            offset = code - marker_offsets[TOKEN_MARKER_TYPES[token_type]]
+            token = token_type(self, offset, location=location,
+                               heading=self.random.uniform(0, 2 * pi))
+            self.objects.append(token)
+
+    def _start_poses(self, robots):
+        # Spaced by angle from the centre, the first in the top left corner
+        # as in the other arenas, each pushed out to the inset rectangle
+        half_width = self.size[0] / 2 - START_INSET
+        half_height = self.size[1] / 2 - START_INSET
+        locations, headings = [], []
+        for i in range(robots):
+            angle = -0.75 * pi + 2 * pi * i / robots
+            x, y = cos(angle), sin(angle)
+            scale = 1 / max(abs(x) / half_width, abs(y) / half_height)
+            locations.append((x * scale, y * scale))
+            headings.append(atan2(-y, -x))
+        return locations, headings
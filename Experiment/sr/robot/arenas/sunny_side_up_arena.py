@@ -26,12 +26,11 @@ class SunnySideUpArena(Arena):
     starting_zone_side = 1
     scoring_zone_side = 2
 
-    def __init__(self, objects=None, wall_markers=True):
-        super(SunnySideUpArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=True, **kwargs):
+        super(SunnySideUpArena, self).__init__(objects, wall_markers, **kwargs)
 
         for i, pos in enumerate(token_positions(separation = 1.5)):
-            token = Token(self, i, damping=10)
-            token.location = pos
+            token = Token(self, i, damping=10, location=pos)
             self.objects.append(token)
 
     def draw_background(self, surface, display):
@@ -2,10 +2,6 @@ from __future__ import division
 
 from math import cos, pi, sin
 
-import pygame
-import random
-from pygame.rect import Rect
-
 from arena import ARENA_MARKINGS_COLOR, ARENA_MARKINGS_WIDTH, Arena
 from ..markers import Token
 from ..vision import MARKER_TOKEN_GOLD, MARKER_TOKEN_SILVER
@@ -19,9 +15,10 @@ PEDESTAL_COLOR = (0x80, 0x80, 0x80)
 
 
 class GoldToken(Token):
-    def __init__(self, arena, marker_number):
+    def __init__(self, arena, marker_number, location=(0,0), heading=0):
         super(GoldToken, self).__init__(arena, marker_number,
-                                        marker_type=MARKER_TOKEN_GOLD, damping=10)
+                                        marker_type=MARKER_TOKEN_GOLD, damping=10,
+                                        location=location, heading=heading)
 
     @property
     def surface_name(self):
@@ -29,9 +26,10 @@ class GoldToken(Token):
 
 
 class SilverToken(Token):
-    def __init__(self, arena, marker_number):
+    def __init__(self, arena, marker_number, location=(0,0), heading=0):
         super(SilverToken, self).__init__(arena, marker_number,
-                                          marker_type=MARKER_TOKEN_SILVER, damping=10)
+                                          marker_type=MARKER_TOKEN_SILVER, damping=10,
+                                          location=location, heading=heading)
 
     @property
     def surface_name(self):
@@ -51,26 +49,28 @@ class TwoColoursAssignmentArena(Arena):
                       -0.75 * pi,
                       -0.25 * pi]
 
-    def __init__(self, objects=None, wall_markers=False):
-        super(TwoColoursAssignmentArena, self).__init__(objects, wall_markers)
+    def __init__(self, objects=None, wall_markers=False, **kwargs):
+        super(TwoColoursAssignmentArena, self).__init__(objects, wall_markers, **kwargs)
 
         def place_token_circle(radius, number_offset=0, angle_offset=0.25 * pi,
                                rotate_silvers=0.0):
             for i in range(TOKENS_PER_CIRCLE):
                 token_type = GoldToken
                 rotation_amount = 0
-                token = token_type(self, number_offset + i)
                 #angle = angle_offset + (2 * pi / TOKENS_PER_CIRCLE) * i
-                angle = random.uniform(0, 2 * pi)
+                angle = self.random.uniform(0, 2 * pi)
                 #radius_random = random.uniform(0.9, 2.4)
-                token.location = (cos(angle) * radius, sin(angle) * radius)
-                token.heading = rotation_amount
+                token = token_type(self, number_offset + i,
+                                   location=(cos(angle) * radius, sin(angle) * radius),
+                                   heading=rotation_amount)
                 self.objects.append(token)
 
         place_token_circle(OUTER_CIRCLE_RADIUS, number_offset=TOKENS_PER_CIRCLE,
                            angle_offset=1.5 * pi, rotate_silvers=pi / 4)
 
     def draw_background(self, surface, display):
+        import pygame
+        from pygame.rect import Rect
 
         def draw_pedestal():
             pygame.draw.rect(surface, PEDESTAL_COLOR,
@@ -0,0 +1,46 @@
+from __future__ import division
+
+class Frame(tuple):
+    """
+    The markers seen in one captured camera frame. Being a tuple, the same
+    frame can safely be handed to every caller until the next capture.
+    """
+
+    def __new__(cls, markers, number, res, timestamp):
+        frame = super(Frame, cls).__new__(cls, markers)
+        frame.number = number
+        frame.res = res
+        frame.timestamp = timestamp
+        return frame
+
+
+class Camera(object):
+    """
+    A robot's camera, capturing a new frame once every ``ticks_per_frame``
+    arena ticks. Capturing is lazy: a frame is only computed the first time
+    it is asked for, then shared by every later request in the same period.
+    """
+
+    def __init__(self, arena, clock, capture, ticks_per_frame=1):
+        self._arena = arena
+        self._clock = clock
+        self._capture = capture
+        self.ticks_per_frame = ticks_per_frame
+        self._frame = None
+
+    def supply(self, markers, res, timestamp):
+        """
+        Store markers captured elsewhere, such as by a batched capture over
+        many robots, as the frame for the current period.
+        """
+        number = self._arena.tick_count // self.ticks_per_frame
+        self._frame = Frame(markers, number, res, timestamp)
+
+    def frame(self, res):
+        number = self._arena.tick_count // self.ticks_per_frame
+        frame = self._frame
+        if frame is None or frame.number != number or frame.res != res:
+            timestamp = self._clock.time()
+            frame = Frame(self._capture(res, timestamp), number, res, timestamp)
+            self._frame = frame
+        return frame
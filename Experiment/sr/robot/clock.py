@@ -0,0 +1,239 @@
+from __future__ import division
+
+import threading
+import time
+import timeit
+import types
+
+try:
+    import builtins
+except ImportError:
+    import __builtin__ as builtins
+
+# Steps shorter than this are not worth a physics tick of their own
+MIN_TIME_STEP = 0.001
+# Tolerance for rounding when comparing simulated times
+TIME_EPSILON = 1e-9
+# Calls to the robot a thread may make at one simulated time before it is
+# made to wait for the next step, so that a script polling in a loop
+# without sleeping still lets simulated time move on
+BUSY_CALLS = 100
+
+class ThreadRetired(SystemExit):
+    """
+    Raised in robot code whose simulation has been reset, to end its thread
+    as quietly as a script calling ``exit()``.
+    """
+
+
+class WallClock(object):
+    """
+    The real clock. Robot code sleeps and reads the time as it always has,
+    and the simulator paces itself against wall time.
+    """
+    virtual = False
+
+    def __init__(self):
+        self._start = time.time()
+
+    @property
+    def elapsed(self):
+        return time.time() - self._start
+
+    def time(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        time.sleep(seconds)
+
+    def checkpoint(self):
+        pass
+
+    def advance(self, time_passed):
+        pass
+
+    def register_thread(self, thread):
+        pass
+
+    def unregister_thread(self, thread=None):
+        pass
+
+    def retire(self, timeout):
+        pass
+
+
+class SimClock(object):
+    """
+    A clock which only moves when the simulator advances it.
+
+    Robot threads registered with the clock sleep in simulated time. The
+    clock moves only once every registered thread is blocked, either in
+    ``sleep`` or in a call to the robot made after ``BUSY_CALLS`` others at
+    the same simulated time, and then no further than the earliest wake-up.
+    Real time plays no part, so a simulation runs the same however busy the
+    machine is. A thread spinning without touching the robot or the clock
+    holds the simulation up for good.
+    """
+    virtual = True
+
+    def __init__(self, epoch=None):
+        # Report times relative to the real time at creation, so that code
+        # which prints or logs timestamps still sees plausible values
+        self._epoch = time.time() if epoch is None else epoch
+        self._now = 0
+        self._condition = threading.Condition()
+        self._threads = set()
+        self._wake_times = {}
+        # Threads waiting for the next step, whatever its length
+        self._yielded = set()
+        self._calls = {}
+        self._retired = False
+
+    @property
+    def elapsed(self):
+        return self._now
+
+    def time(self):
+        return self._epoch + self._now
+
+    def sleep(self, seconds):
+        with self._condition:
+            self._block(self._now + max(seconds, 0))
+
+    def checkpoint(self):
+        """
+        Count a call to the robot by the current thread, and block it until
+        the next step if it has made too many without sleeping.
+        """
+        thread = threading.current_thread()
+        with self._condition:
+            if thread not in self._threads:
+                return
+            calls = self._calls.get(thread, 0) + 1
+            if calls < BUSY_CALLS:
+                self._calls[thread] = calls
+                return
+            # No step is shorter than this, so the next one wakes it
+            self._yielded.add(thread)
+            try:
+                self._block(self._now + MIN_TIME_STEP)
+            finally:
+                self._yielded.discard(thread)
+
+    def _block(self, wake_time):
+        # Called holding the condition
+        thread = threading.current_thread()
+        self._wake_times[thread] = wake_time
+        self._calls.pop(thread, None)
+        self._condition.notify_all()
+        try:
+            while not self._due(wake_time):
+                if self._retired:
+                    raise ThreadRetired()
+                self._condition.wait()
+        finally:
+            del self._wake_times[thread]
+
+    def advance(self, time_passed):
+        with self._condition:
+            self._now += time_passed
+            self._condition.notify_all()
+
+    def register_thread(self, thread):
+        with self._condition:
+            self._threads.add(thread)
+
+    def unregister_thread(self, thread=None):
+        if thread is None:
+            thread = threading.current_thread()
+        with self._condition:
+            self._threads.discard(thread)
+            self._calls.pop(thread, None)
+            self._condition.notify_all()
+
+    def retire(self, timeout):
+        """
+        End every registered thread the next time it sleeps, by raising
+        ThreadRetired in it. Waits up to ``timeout`` real seconds for them
+        to finish.
+        """
+        deadline = time.time() + timeout
+        with self._condition:
+            self._retired = True
+            self._condition.notify_all()
+            while self._threads:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                self._condition.wait(remaining)
+
+    def _due(self, wake_time):
+        return wake_time - self._now <= TIME_EPSILON
+
+    def _idle(self):
+        # A thread whose wake-up time has passed counts as running, even if
+        # it has not been scheduled yet to notice that
+        return not any(self._due(self._wake_times.get(thread, self._now))
+                       for thread in self._threads)
+
+    def wait_until_idle(self):
+        """
+        Wait for every registered thread to block on simulated time.
+        """
+        with self._condition:
+            while not self._idle():
+                self._condition.wait()
+
+    def next_step(self, max_step, deadlines=()):
+        """
+        Return how far the clock should be advanced next: at most ``max_step``,
+        but no further than the earliest pending wake-up, or the earliest of
+        the given ``deadlines`` in elapsed simulated time.
+        """
+        with self._condition:
+            pending = [wake_time - self._now
+                       for thread, wake_time in self._wake_times.items()
+                       if thread not in self._yielded and not self._due(wake_time)]
+            pending.extend(deadline - self._now for deadline in deadlines
+                           if not self._due(deadline))
+        if not pending:
+            return max_step
+        return min(max_step, max(min(pending), MIN_TIME_STEP))
+
+
+def _module_with_overrides(module, **overrides):
+    replacement = types.ModuleType(module.__name__, module.__doc__)
+    replacement.__dict__.update(module.__dict__)
+    replacement.__dict__.update(overrides)
+    return replacement
+
+def script_builtins(clock):
+    """
+    Build a ``__builtins__`` mapping for robot scripts under which ``import
+    time`` and ``import timeit`` give versions backed by the given clock.
+    """
+    def script_time():
+        # Reading the time counts as a call, so that a loop waiting for it
+        # to pass without sleeping still sees it change
+        clock.checkpoint()
+        return clock.time()
+
+    modules = {
+        'time': _module_with_overrides(time,
+                                       time=script_time,
+                                       sleep=clock.sleep,
+                                       monotonic=script_time,
+                                       perf_counter=script_time),
+        'timeit': _module_with_overrides(timeit,
+                                         default_timer=script_time),
+    }
+    real_import = builtins.__import__
+
+    def sim_import(name, globals=None, locals=None, fromlist=(), level=0):
+        if level == 0 and name in modules:
+            return modules[name]
+        return real_import(name, globals, locals, fromlist, level)
+
+    script_builtins = dict(builtins.__dict__)
+    script_builtins['__import__'] = sim_import
+    return script_builtins
@@ -1,17 +1,58 @@
 from __future__ import division
+from collections import OrderedDict
 from math import degrees
 
 import pygame
 
 PIXELS_PER_METER = 100
 
-sprites = {}
+# Bounds on how many loaded and rotated sprites are kept around
+SPRITE_CACHE_SIZE = 32
+ROTATED_SPRITE_CACHE_SIZE = 2048
+# Rotations are cached to the nearest step, in degrees
+ROTATION_STEP = 1
+
+class LRUCache(object):
+    """
+    A cache which forgets its least recently used entries once it holds
+    more than ``max_size`` of them.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key, make):
+        try:
+            value = self._entries.pop(key)
+        except KeyError:
+            value = make()
+            if len(self._entries) >= self.max_size:
+                self._entries.popitem(last=False)
+        self._entries[key] = value
+        return value
+
+    def clear(self):
+        self._entries.clear()
+
+sprites = LRUCache(SPRITE_CACHE_SIZE)
+rotated_sprites = LRUCache(ROTATED_SPRITE_CACHE_SIZE)
 
 def get_surface(name):
-    if name not in sprites:
-        sprites[name] = pygame.image.load(name).convert_alpha()
+    return sprites.get(name, lambda: pygame.image.load(name).convert_alpha())
 
-    return sprites[name]
+def get_rotated_surface(name, angle):
+    """
+    Return the named sprite rotated anticlockwise by ``angle`` degrees,
+    rounded to the nearest ROTATION_STEP.
+    """
+    steps = int(round(angle / ROTATION_STEP)) % int(round(360 / ROTATION_STEP))
+    return rotated_sprites.get((name, steps),
+                               lambda: pygame.transform.rotate(get_surface(name),
+                                                               steps * ROTATION_STEP))
 
 
 def _int_without_remainder(val):
@@ -33,6 +74,8 @@ class Display(object):
         self._window = pygame.display.set_mode(self.size)
         pygame.display.set_caption("SR Turtle Robot Simulator")
         self._screen = pygame.display.get_surface()
+        # What was drawn last frame, for working out what has changed
+        self._drawn = None
         self._draw_background()
         self._draw()
 
@@ -43,30 +86,108 @@ class Display(object):
         self._background = pygame.Surface(self.size)
         self.arena.draw_background(self._background, self)
 
-    def _draw(self):
-        self._screen.blit(self._background, (0, 0))
-
-        for obj in self.arena.objects:
+    def _placements(self):
+        """
+        Work out where every sprite goes this frame, as a list of
+        ``(obj, surface, screen_location, rect)`` in drawing order, where
+        ``rect`` generously covers the pixels the sprite will touch.
+        """
+        placements = []
+        state = self.arena.object_state()
+        for obj, location, heading in zip(state.objects,
+                                          state.locations.tolist(),
+                                          state.headings.tolist()):
             if obj.surface_name is None:
                 continue
-            with obj.lock:
-                heading = -degrees(obj.heading)
-                x, y = self.to_pixel_coord(obj.location)
-            surface = get_surface(obj.surface_name)
-            surface = pygame.transform.rotate(surface, heading)
+            heading = -degrees(heading)
+            x, y = self.to_pixel_coord(location)
+            surface = get_rotated_surface(obj.surface_name, heading)
             object_width, object_height = surface.get_size()
             screen_location = (x - object_width / 2, y - object_height / 2)
-            self._screen.blit(surface, screen_location)
+            # A pixel of slack either side, whichever way blit rounds
+            rect = pygame.Rect(int(screen_location[0]) - 1, int(screen_location[1]) - 1,
+                               object_width + 2, object_height + 2)
+            placements.append((obj, surface, screen_location, rect))
+        return placements
 
-        pygame.display.flip()
+    def _draw(self):
+        placements = self._placements()
+        current = dict((obj, (surface, screen_location, rect))
+                       for obj, surface, screen_location, rect in placements)
+        previous = self._drawn
+
+        if previous is None:
+            self._screen.blit(self._background, (0, 0))
+            for obj, surface, screen_location, rect in placements:
+                self._screen.blit(surface, screen_location)
+            pygame.display.flip()
+            self._drawn = current
+            return
+
+        # Only the areas sprites have left or moved into need redrawing
+        dirty = []
+        for obj, (surface, screen_location, rect) in current.items():
+            old = previous.get(obj)
+            if old is None:
+                dirty.append(rect)
+            elif old[0] is not surface or old[1] != screen_location:
+                dirty.append(rect.union(old[2]))
+        for obj, (surface, screen_location, rect) in previous.items():
+            if obj not in current:
+                dirty.append(rect)
+
+        if dirty:
+            rects = [rect for obj, surface, screen_location, rect in placements]
+            for area in dirty:
+                # Restore the background, then repaint everything overlapping
+                # the area in the usual order, clipped so that sprites outside
+                # it are not blended over themselves a second time
+                self._screen.set_clip(area)
+                self._screen.blit(self._background, area, area)
+                for i in area.collidelistall(rects):
+                    obj, surface, screen_location, rect = placements[i]
+                    self._screen.blit(surface, screen_location)
+            self._screen.set_clip(None)
+            pygame.display.update(dirty)
+        self._drawn = current
 
     ## Public Methods ##
 
-    def tick(self, time_passed):
-        self.arena.tick(time_passed)
-        # TODO: Allow multiple displays on one arena without them all ticking it
+    def show(self, arena):
+        """
+        Draw the given arena from now on, in the same window.
+        """
+        redraw_background = type(arena) is not type(self.arena)
+        self.arena = arena
+        arena_w, arena_h = arena.size
+        size = (_int_without_remainder(arena_w * PIXELS_PER_METER),
+                _int_without_remainder(arena_h * PIXELS_PER_METER))
+        if size != self.size:
+            self.size = size
+            self._window = pygame.display.set_mode(self.size)
+            self._screen = pygame.display.get_surface()
+        if redraw_background:
+            self._draw_background()
+        self._drawn = None
         self._draw()
 
+    def update(self):
+        """
+        Observer hook called by the simulator after each arena tick.
+
+        Returns False once the window has been closed (or Escape pressed),
+        which asks the simulator to stop.
+        """
+        if any(event.type == pygame.QUIT
+                or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)
+                for event in pygame.event.get()):
+            return False
+        self._draw()
+        return True
+
+    def close(self):
+        pygame.quit()
+
     def to_pixel_coord(self, world_coord, arena=None):
         if arena is None: arena = self.arena
         offset_x = arena.size[0] / 2
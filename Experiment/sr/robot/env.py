@@ -0,0 +1,103 @@
+"""
+A programmatic interface to the simulator, for optimisers and test
+harnesses which drive the robots themselves rather than through scripts:
+
+    env = SimEnvironment({'game': 'two-colours-assignment'})
+    observations = env.reset(seed=0)
+    while ...:
+        observations, info = env.step([(50, 50)])
+
+Nothing runs in the background: there are no threads and no display, and
+the world only moves when ``step`` is called.
+"""
+
+from __future__ import division
+
+from .world_batch import WorldBatch
+
+class SimEnvironment(object):
+    """
+    A single world with ``robots`` robots driven by actions.
+
+    An action for a robot is either a ``(left, right)`` pair of motor
+    powers, or a dict with an optional ``'motors'`` pair and an optional
+    ``'grab'`` which grabs when true and releases when false. None leaves
+    the robot as it is. Each ``step`` advances ``ticks_per_step`` physics
+    ticks.
+    """
+
+    def __init__(self, config=None, robots=1, ticks_per_step=1,
+                 physics_rate=None, res=(800, 600)):
+        self.config = dict(config) if config is not None else {}
+        self.robot_count = robots
+        self.ticks_per_step = ticks_per_step
+        self.physics_rate = physics_rate
+        self.res = res
+        self._batch = None
+
+    @property
+    def simulator(self):
+        return self._batch.worlds[0] if self._batch is not None else None
+
+    @property
+    def robots(self):
+        return self._batch.robots[0]
+
+    def reset(self, seed=None, config=None):
+        """
+        Start a new episode, from the given seed and, if given, a new game
+        config. Returns the first observations.
+        """
+        if config is not None:
+            self.config = dict(config)
+        if self._batch is None:
+            self._batch = WorldBatch(self.config, [seed], [None] * self.robot_count,
+                                     physics_rate=self.physics_rate, res=self.res)
+        else:
+            # The world, its walls and its bodies are kept for the next episode
+            self._batch.reset([seed], config)
+        return self._observe()
+
+    def _apply(self, robot, action):
+        if action is None:
+            return
+        if not isinstance(action, dict):
+            action = {'motors': action}
+        if 'motors' in action:
+            motor = robot.motors[0]
+            motor.m0.power, motor.m1.power = action['motors']
+        if 'grab' in action:
+            if action['grab']:
+                if robot._holding is None:
+                    robot.grab()
+            else:
+                robot.release()
+
+    def _observe(self):
+        frames = self._batch.see()[0]
+        return [{'location': robot.location,
+                 'heading': robot.heading,
+                 'holding': robot._holding is not None,
+                 'markers': frame}
+                for robot, frame in zip(self.robots, frames)]
+
+    def step(self, actions):
+        """
+        Apply one action per robot, then advance the world. Returns the new
+        observations, one dict per robot, and an info dict.
+        """
+        if self._batch is None:
+            raise RuntimeError("Call reset() before step()")
+        for robot, action in zip(self.robots, actions):
+            self._apply(robot, action)
+        for _ in range(self.ticks_per_step):
+            self._batch.step()
+        sim = self.simulator
+        info = {'time': sim.time_simulated,
+                'tick': sim.arena.tick_count}
+        return self._observe(), info
+
+    def close(self):
+        if self._batch is not None:
+            self._batch.close()
+            self._batch = None
@@ -4,6 +4,9 @@ class GameObject(object):
     surface_name = None
     marker_info = None
     grabbable = False
+    blurs_when_moving = False
+    # Objects with a tick() may set this while ticking them would do nothing
+    idle = False
 
     def __init__(self, arena):
         self.arena = arena
@@ -1,8 +1,6 @@
 from game_object import GameObject
 from vision import create_marker_info_by_type, MARKER_TOKEN_GOLD, MARKER_TOKEN_SILVER, MARKER_ARENA
 
-import pypybox2d
-
 class Token(GameObject):
     grabbable = True
 
@@ -15,6 +13,7 @@ class Token(GameObject):
         if self._body is None:
             return # Slight hack: deal with the initial setting from the constructor
         self._body.position = new_pos
+        self.arena.object_moved(self)
 
     @property
     def heading(self):
@@ -25,24 +24,22 @@ class Token(GameObject):
         if self._body is None:
             return # Slight hack: deal with the initial setting from the constructor
         self._body.angle = _new_heading
+        self.arena.object_moved(self)
 
-    def __init__(self, arena, number, damping, marker_type=MARKER_TOKEN_GOLD):
-        self._body = arena._physics_world.create_body(position=(0, 0),
-                                                      angle=0,
-                                                      linear_damping=damping,
-                                                      angular_damping=damping,
-                                                      type=pypybox2d.body.Body.DYNAMIC)
+    def __init__(self, arena, number, damping, marker_type=MARKER_TOKEN_GOLD,
+                 location=(0,0), heading=0):
+        WIDTH = 0.09
+        self._body = None
         super(Token, self).__init__(arena)
+        self._body = arena.physics.create_body((WIDTH, WIDTH),
+                                               damping=damping,
+                                               density=1,
+                                               restitution=0.2,
+                                               friction=0.3,
+                                               position=location,
+                                               angle=heading)
         self.marker_info = create_marker_info_by_type(marker_type, number)
         self.grabbed = False
-        WIDTH = 0.09
-        self._body.create_polygon_fixture([(-WIDTH, -WIDTH),
-                                           ( WIDTH, -WIDTH),
-                                           ( WIDTH,  WIDTH),
-                                           (-WIDTH,  WIDTH)],
-                                          density=1,
-                                          restitution=0.2,
-                                          friction=0.3)
 
     def grab(self):
         self.grabbed = True
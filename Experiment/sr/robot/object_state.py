@@ -0,0 +1,75 @@
+from __future__ import division
+
+import numpy as np
+
+class ObjectState(object):
+    """
+    Struct-of-arrays snapshot of an arena's objects, for vectorised queries.
+
+    Row ``i`` of each array describes ``objects[i]``. A published snapshot is
+    never modified: updates build a new one, so a reader holding a snapshot
+    always sees a consistent set of arrays without locking.
+    """
+
+    def __init__(self, objects, locations, headings, velocities, codes, marked,
+                 blurs, rows=None):
+        self.objects = objects
+        self.locations = locations
+        self.headings = headings
+        self.velocities = velocities
+        self.speeds = np.hypot(velocities[:, 0], velocities[:, 1])
+        # Marker code of each object, or -1 if it has no marker
+        self.codes = codes
+        self.marked = marked
+        # Whether the object's own motion blurs it in other robots' vision
+        self.blurs = blurs
+        if rows is None:
+            rows = dict((obj, row) for row, obj in enumerate(objects))
+        self.rows = rows
+
+    @classmethod
+    def build(cls, objects, location_of, heading_of, velocity_of):
+        objects = list(objects)
+        count = len(objects)
+        locations = np.zeros((count, 2))
+        headings = np.zeros(count)
+        velocities = np.zeros((count, 2))
+        codes = np.full(count, -1, dtype=np.int64)
+        marked = np.zeros(count, dtype=bool)
+        blurs = np.zeros(count, dtype=bool)
+        for row, obj in enumerate(objects):
+            locations[row] = tuple(location_of(obj))
+            headings[row] = heading_of(obj)
+            velocities[row] = tuple(velocity_of(obj))
+            if obj.marker_info is not None:
+                codes[row] = obj.marker_info.code
+                marked[row] = True
+            blurs[row] = obj.blurs_when_moving
+        return cls(objects, locations, headings, velocities, codes, marked, blurs)
+
+    def pose(self, obj):
+        """
+        Return ``((x, y), heading)`` of the given object, or None if it is
+        not in this snapshot.
+        """
+        row = self.rows.get(obj)
+        if row is None:
+            return None
+        x, y = self.locations[row].tolist()
+        return (x, y), self.headings[row].item()
+
+    def updated(self, changes):
+        """
+        Return a new snapshot with the given ``(obj, location, heading,
+        velocity)`` changes applied.
+        """
+        locations = self.locations.copy()
+        headings = self.headings.copy()
+        velocities = self.velocities.copy()
+        for obj, location, heading, velocity in changes:
+            row = self.rows[obj]
+            locations[row] = tuple(location)
+            headings[row] = heading
+            velocities[row] = tuple(velocity)
+        return ObjectState(self.objects, locations, headings, velocities,
+                           self.codes, self.marked, self.blurs, self.rows)
@@ -0,0 +1,594 @@
+"""
+Physics backends for the arena.
+
+Each backend creates rectangular bodies, drives robots by their two wheels,
+attaches grabbed objects to their carriers and steps the world. Bodies of
+every backend have ``position``, ``angle``, ``linear_velocity``, ``awake``
+and ``static``, which is all the arena and its objects read of them.
+
+``box2d`` is the full rigid-body simulation, and the reference for what the
+robots ought to do. ``kinematic`` integrates the same wheel model directly
+and only pushes overlapping bodies apart, trading fidelity in collisions
+for speed.
+
+Either backend runs under one of the named ``PROFILES``, which trade the
+accuracy of each step against how long a step may be. Under every profile
+but ``reference``, the step grows while nothing is touching and shrinks
+back around collisions, grabs and releases.
+"""
+
+from __future__ import division
+
+from collections import namedtuple
+from math import atan2, cos, exp, hypot, sin
+
+BOX2D = 'box2d'
+KINEMATIC = 'kinematic'
+
+DEFAULT_PHYSICS = BOX2D
+
+# The wheel model: force per unit of motor power, and the friction force
+# per unit of wheel speed over the ground
+WHEEL_FORCE_PER_POWER = 0.6
+WHEEL_FRICTION = 50.2
+
+# Solver iterations per step (Box2D only), and the bounds on the length of
+# a step as multiples of the simulator's physics step. As compare_profiles.py
+# measures them over eight seeds of each assignment script, ``balanced`` and
+# ``fast`` end 14 and 15 of the 16 trials as the reference does, and move
+# each script's median completion time by under 6%; single trials can
+# differ by much more, as the robots' scripts react to small differences in
+# where things end up.
+Profile = namedtuple('Profile', ['velocity_iterations', 'position_iterations',
+                                 'min_step', 'max_step'])
+
+PROFILES = {'reference': Profile(8, 3, 1, 1),
+            'balanced': Profile(8, 3, 1, 2),
+            'fast': Profile(4, 1, 1, 4)}
+
+DEFAULT_PROFILE = 'reference'
+
+# How much longer each step may be than the last, while nothing touches
+STEP_GROWTH = 1.25
+# No body may move further than this in one step, so that none passes
+# through a token (a token is 0.18 across)
+MAX_TRAVEL = 0.09
+# Bodies touching slower than this are resting against each other, not
+# colliding
+RESTING_SPEED = 0.01
+
+def create_physics(name, left, right, top, bottom, profile=DEFAULT_PROFILE):
+    """
+    Create the named backend for an arena with the given walls, running
+    under the named profile.
+    """
+    backends = {BOX2D: Box2DPhysics,
+                KINEMATIC: KinematicPhysics}
+    try:
+        backend = backends[name]
+    except KeyError:
+        raise ValueError("Unknown physics backend '{0}'; choose one of {1}"
+                         .format(name, ", ".join(sorted(backends))))
+    return backend(left, right, top, bottom, find_profile(profile))
+
+def find_profile(name):
+    try:
+        return PROFILES[name]
+    except KeyError:
+        raise ValueError("Unknown physics profile '{0}'; choose one of {1}"
+                         .format(name, ", ".join(sorted(PROFILES))))
+
+
+class AdaptiveStepping(object):
+    """
+    Chooses how long each step of a backend should be. Backends say when
+    bodies are touching and how fast their bodies are moving.
+    """
+
+    def _init_stepping(self, profile):
+        self.profile = profile
+        self._scale = profile.min_step
+        # Set by a grab or release, until the next step is chosen
+        self._disturbed = False
+
+    def next_time_step(self, base_step):
+        """
+        The length of the next step, given the simulator's physics step.
+        """
+        profile = self.profile
+        if profile.min_step == profile.max_step:
+            return base_step * profile.min_step
+        if self._disturbed or self._in_contact():
+            self._scale = profile.min_step
+        else:
+            self._scale = min(self._scale * STEP_GROWTH, profile.max_step)
+        self._disturbed = False
+        time_step = base_step * self._scale
+        speed = self._top_speed()
+        if speed * time_step > MAX_TRAVEL:
+            time_step = max(MAX_TRAVEL / speed, base_step * profile.min_step)
+        return time_step
+
+
+WALL_WIDTH = 2
+# Spacing of the bodies waiting outside the walls to be reused
+PARK_SPACING = 1
+
+class OrderedPairs(dict):
+    """
+    Stands in for the set in which the pypybox2d broad phase gathers new
+    contact pairs. A set iterates by the pairs' memory addresses, so the
+    contacts were created, and so solved, in a different order from one run
+    to the next; this iterates in the order the pairs were found.
+    """
+
+    def add(self, pair):
+        self[pair] = None
+
+
+class Box2DPhysics(AdaptiveStepping):
+    """
+    Rigid-body physics using pypybox2d.
+    """
+    name = BOX2D
+
+    def __init__(self, left, right, top, bottom, profile=PROFILES[DEFAULT_PROFILE]):
+        import pypybox2d
+        self._pypybox2d = pypybox2d
+        # Where the walls are, as (left, right, top, bottom)
+        self.bounds = (left, right, top, bottom)
+        self.world = pypybox2d.world.World(gravity=(0, 0))
+        # Reaches into the broad phase, which offers no way to configure this
+        self.world.contact_manager.broadphase._pair_buffer = OrderedPairs()
+        self._init_stepping(profile)
+        # Bodies in use, and those given back by recycle() for reuse, each
+        # with the settings they were created with
+        self._bodies = []
+        self._pool = {}
+        # Where each body waits while in the pool: outside the walls, and
+        # clear of every other
+        self._park_slots = {}
+        self._park_x = right + WALL_WIDTH + PARK_SPACING
+        # Create the arena wall
+        WALL_SETTINGS = {'restitution': 0.2, 'friction': 0.3}
+
+        wall_right = self.world.create_body(position=(right, 0),
+                                            type=pypybox2d.body.Body.STATIC)
+        wall_right.create_polygon_fixture([(WALL_WIDTH, top - WALL_WIDTH),
+                                           (WALL_WIDTH, bottom + WALL_WIDTH),
+                                           (0, bottom + WALL_WIDTH),
+                                           (0, top - WALL_WIDTH)],
+                                          **WALL_SETTINGS)
+
+        wall_left = self.world.create_body(position=(left, 0),
+                                           type=pypybox2d.body.Body.STATIC)
+        wall_left.create_polygon_fixture([(-WALL_WIDTH, top - WALL_WIDTH),
+                                          (0, top - WALL_WIDTH),
+                                          (0, bottom + WALL_WIDTH),
+                                          (-WALL_WIDTH, bottom + WALL_WIDTH)],
+                                         **WALL_SETTINGS)
+
+        wall_top = self.world.create_body(position=(0, top),
+                                          type=pypybox2d.body.Body.STATIC)
+        wall_top.create_polygon_fixture([(left, 0),
+                                         (left, -WALL_WIDTH),
+                                         (right, -WALL_WIDTH),
+                                         (right, 0)],
+                                        **WALL_SETTINGS)
+
+        wall_bottom = self.world.create_body(position=(0, bottom),
+                                             type=pypybox2d.body.Body.STATIC)
+        wall_bottom.create_polygon_fixture([(left, 0),
+                                            (right, 0),
+                                            (right, WALL_WIDTH),
+                                            (left, WALL_WIDTH)],
+                                           **WALL_SETTINGS)
+
+    def _init_stepping(self, profile):
+        super(Box2DPhysics, self)._init_stepping(profile)
+        if profile.min_step != profile.max_step:
+            # The reference profile keeps the duplicates, so that its results
+            # stay as they always were; longer steps would multiply them
+            self.world.contact_manager.contact_filter = self._is_new_contact
+        else:
+            self.world.contact_manager.contact_filter = None
+
+    def create_body(self, half_size, static=False, density=0.0, damping=0.0,
+                    restitution=0.0, friction=0.2, position=(0, 0), angle=0):
+        settings = (tuple(half_size), static, density, damping, restitution, friction)
+        pooled = self._pool.get(settings)
+        if pooled:
+            body = pooled.pop(0)
+            body.position = position
+            body.angle = angle
+            body.awake = True
+        else:
+            body = self._new_body(settings, position, angle)
+        self._bodies.append((settings, body))
+        return body
+
+    def _new_body(self, settings, position, angle):
+        half_size, static, density, damping, restitution, friction = settings
+        Body = self._pypybox2d.body.Body
+        # Made where it starts: bodies made on top of one another and moved
+        # apart later would all be paired up by the broad phase first
+        body = self.world.create_body(position=position,
+                                      angle=angle,
+                                      linear_damping=damping,
+                                      angular_damping=damping,
+                                      type=Body.STATIC if static else Body.DYNAMIC)
+        half_width, half_height = half_size
+        body.create_polygon_fixture([(-half_width, -half_height),
+                                     ( half_width, -half_height),
+                                     ( half_width,  half_height),
+                                     (-half_width,  half_height)],
+                                    density=density,
+                                    restitution=restitution,
+                                    friction=friction)
+        return body
+
+    def _apply_wheel_force(self, body, y_position, power):
+        location_world_space = body.get_world_point((0, y_position))
+        force_magnitude = power * WHEEL_FORCE_PER_POWER
+        # account for friction
+        frict_world = body.get_linear_velocity_from_local_point((0, y_position))
+        frict_x, frict_y = body.get_local_vector(frict_world)
+        force_magnitude -= frict_x * WHEEL_FRICTION
+        heading = body.angle
+        force_world_space = (force_magnitude * cos(heading),
+                             force_magnitude * sin(heading))
+        body.apply_force(force_world_space, location_world_space)
+
+    def drive(self, body, half_width, left_power, right_power):
+        # left wheel
+        self._apply_wheel_force(body, -half_width, left_power)
+        # right wheel
+        self._apply_wheel_force(body,  half_width, right_power)
+        # kill the lateral velocity
+        right_normal = body.get_world_vector((0, 1))
+        lateral_vel = (right_normal.dot(body.linear_velocity) *
+                       right_normal)
+        impulse = body.mass * -lateral_vel
+        body.apply_linear_impulse(impulse, body.world_center)
+
+    def attach(self, carrier, carried, offset):
+        self._disturbed = True
+        return self.world.create_weld_joint(carrier,
+                                            carried,
+                                            local_anchor_a=(offset, 0),
+                                            local_anchor_b=(0, 0))
+
+    def detach(self, joint):
+        self._disturbed = True
+        self.world.destroy_joint(joint)
+
+    def recycle(self, profile=DEFAULT_PROFILE):
+        """
+        Take back every body, for the next arena built on this world to
+        reuse, and run under the named profile from now on. The arena's
+        walls stay as they are.
+        """
+        for joint in list(self.world.joints):
+            self.world.destroy_joint(joint)
+        for settings, body in self._bodies:
+            # Parked asleep rather than deactivated, which pypybox2d cannot
+            # undo
+            slot = self._park_slots.setdefault(body, len(self._park_slots))
+            body.position = (self._park_x + slot * PARK_SPACING, 0)
+            body.angle = 0
+            body.linear_velocity = (0, 0)
+            body.angular_velocity = 0
+            body.awake = False
+            self._pool.setdefault(settings, []).append(body)
+        self._bodies = []
+        self.world.clear_forces()
+        self._init_stepping(find_profile(profile))
+
+    def _is_new_contact(self, fixture_a, fixture_b):
+        # pypybox2d's own check for an existing contact never skips one, so
+        # each time the broadphase finds a pair again it would add another
+        for contact in fixture_a.body._contacts:
+            if {contact.fixture_a, contact.fixture_b} == {fixture_a, fixture_b}:
+                return False
+        return True
+
+    def _in_contact(self):
+        # Touching bodies may never sleep, so only count those still moving
+        for contact in self.world.contact_manager.contacts:
+            if contact.touching and any(hypot(*body.linear_velocity) > RESTING_SPEED
+                                        for body in (contact.body_a, contact.body_b)):
+                return True
+        return False
+
+    def _top_speed(self):
+        return max([hypot(*body.linear_velocity)
+                    for body in self.world.bodies if body.awake] or [0])
+
+    def step(self, time_passed):
+        self.world.step(time_passed,
+                        vel_iters=self.profile.velocity_iterations,
+                        pos_iters=self.profile.position_iterations)
+
+
+## Kinematic backend ##
+
+# Below these speeds a body with nothing driving it comes to rest
+REST_SPEED = 1e-4
+REST_ANGULAR_SPEED = 1e-4
+# Passes over the bodies pushed in a step, so that pushes can be passed on
+PUSH_PASSES = 3
+
+class KinematicBody(object):
+    """
+    A rectangle which collides as the circle inscribed in it, unless it is
+    static, when it collides as itself.
+    """
+
+    def __init__(self, half_size, static, density, damping):
+        self.half_size = half_size
+        self.radius = min(half_size)
+        self.static = static
+        self.mass = density * 4 * half_size[0] * half_size[1]
+        self.inertia = self.mass * (half_size[0] ** 2 + half_size[1] ** 2) / 3
+        self.damping = damping
+        self.position = (0.0, 0.0)
+        self._angle = 0.0
+        self.linear_velocity = (0.0, 0.0)
+        self.awake = not static
+        # Forward and angular speed of a driven body
+        self.speed = 0.0
+        self.angular_speed = 0.0
+        # (half_width, left_power, right_power) for a robot, once driven
+        self.wheels = None
+        # The attachment carrying this body, if any
+        self.carrier = None
+
+    @property
+    def angle(self):
+        return self._angle
+
+    @angle.setter
+    def angle(self, angle):
+        # Kept within [-pi, pi], as Box2D reports it
+        self._angle = atan2(sin(angle), cos(angle))
+
+    def __repr__(self):
+        return "KinematicBody(position={0}, angle={1})".format(self.position, self.angle)
+
+
+class Attachment(object):
+    def __init__(self, carrier, carried, offset):
+        self.carrier = carrier
+        self.carried = carried
+        self.offset = offset
+        self.relative_angle = carried.angle - carrier.angle
+
+    def place(self):
+        carrier = self.carrier
+        x, y = carrier.position
+        heading = carrier.angle
+        self.carried.position = (x + self.offset * cos(heading),
+                                 y + self.offset * sin(heading))
+        self.carried.angle = heading + self.relative_angle
+
+
+def _relax(value, target, decay):
+    return target + (value - target) * decay
+
+class KinematicPhysics(AdaptiveStepping):
+    """
+    Robots follow the wheel model exactly, with their lateral velocity
+    killed as in the Box2D backend, integrated in closed form. Nothing has
+    momentum besides: bodies are only ever pushed out of each other, and
+    out of the walls.
+    """
+    name = KINEMATIC
+
+    def __init__(self, left, right, top, bottom, profile=PROFILES[DEFAULT_PROFILE]):
+        self._init_stepping(profile)
+        self.left, self.right = left, right
+        self.top, self.bottom = top, bottom
+        self.bounds = (left, right, top, bottom)
+        self.bodies = []
+        self.static_bodies = []
+        self.attachments = []
+        # Whether anything was pushed in the last step
+        self._pushed = False
+
+    def create_body(self, half_size, static=False, density=0.0, damping=0.0,
+                    restitution=0.0, friction=0.2, position=(0, 0), angle=0):
+        body = KinematicBody(half_size, static, density, damping)
+        body.position = tuple(position)
+        body.angle = angle
+        (self.static_bodies if static else self.bodies).append(body)
+        return body
+
+    def drive(self, body, half_width, left_power, right_power):
+        body.wheels = (half_width, left_power, right_power)
+        if left_power or right_power:
+            body.awake = True
+
+    def attach(self, carrier, carried, offset):
+        self._disturbed = True
+        attachment = Attachment(carrier, carried, offset)
+        carried.carrier = attachment
+        self.attachments.append(attachment)
+        return attachment
+
+    def detach(self, attachment):
+        self._disturbed = True
+        attachment.carried.carrier = None
+        attachment.carried.linear_velocity = (0.0, 0.0)
+        self.attachments.remove(attachment)
+
+    def recycle(self, profile=DEFAULT_PROFILE):
+        """
+        Forget every body, for the next arena built on this backend, and
+        run under the named profile from now on. Bodies here cost too little
+        to be worth keeping.
+        """
+        self.bodies = []
+        self.static_bodies = []
+        self.attachments = []
+        self._pushed = False
+        self._init_stepping(find_profile(profile))
+
+    def _drive(self, body, time_passed):
+        half_width, left_power, right_power = body.wheels
+        # The wheel forces, less friction, give first-order responses in
+        # forward and angular speed; these are their targets and time constants
+        friction = 2 * WHEEL_FRICTION
+        target_speed = WHEEL_FORCE_PER_POWER * (left_power + right_power) / friction
+        target_angular_speed = (WHEEL_FORCE_PER_POWER * (left_power - right_power) /
+                                (friction * half_width))
+        speed = _relax(body.speed, target_speed,
+                       exp(-time_passed * friction / body.mass))
+        angular_speed = _relax(body.angular_speed, target_angular_speed,
+                               exp(-time_passed * friction * half_width ** 2 / body.inertia))
+
+        # Move along the arc given by the mean speeds over the step
+        mean_speed = (body.speed + speed) / 2
+        mean_angular_speed = (body.angular_speed + angular_speed) / 2
+        x, y = body.position
+        heading = body.angle
+        turned = mean_angular_speed * time_passed
+        if abs(turned) < 1e-9:
+            x += mean_speed * time_passed * cos(heading)
+            y += mean_speed * time_passed * sin(heading)
+        else:
+            radius = mean_speed / mean_angular_speed
+            x += radius * (sin(heading + turned) - sin(heading))
+            y -= radius * (cos(heading + turned) - cos(heading))
+        body.position = (x, y)
+        body.angle = heading + turned
+        body.speed, body.angular_speed = speed, angular_speed
+        body.linear_velocity = (speed * cos(body.angle), speed * sin(body.angle))
+
+        if (not left_power and not right_power and
+                abs(speed) < REST_SPEED and abs(angular_speed) < REST_ANGULAR_SPEED):
+            body.speed = body.angular_speed = 0.0
+            body.linear_velocity = (0.0, 0.0)
+            body.awake = False
+        # Commands only last a step, as forces do in Box2D
+        body.wheels = (half_width, 0, 0)
+
+    def _keep_in_bounds(self, body):
+        x, y = body.position
+        r = body.radius
+        clamped = (min(max(x, self.left + r), self.right - r),
+                   min(max(y, self.top + r), self.bottom - r))
+        if clamped != (x, y):
+            body.position = clamped
+            return True
+        return False
+
+    def _push_out_of_static(self, body, wall):
+        # Find the point of the wall's rectangle nearest the body's centre
+        x, y = body.position
+        wx, wy = wall.position
+        c, s = cos(wall.angle), sin(wall.angle)
+        local_x = (x - wx) * c + (y - wy) * s
+        local_y = -(x - wx) * s + (y - wy) * c
+        half_width, half_height = wall.half_size
+        near_x = min(max(local_x, -half_width), half_width)
+        near_y = min(max(local_y, -half_height), half_height)
+        dx, dy = local_x - near_x, local_y - near_y
+        distance = hypot(dx, dy)
+        if distance >= body.radius:
+            return False
+        if distance > 0:
+            depth = body.radius - distance
+            dx, dy = dx / distance * depth, dy / distance * depth
+        elif half_width - abs(local_x) < half_height - abs(local_y):
+            # Centre inside the wall: leave by the nearest side
+            dx = (half_width - abs(local_x) + body.radius) * (1 if local_x >= 0 else -1)
+            dy = 0
+        else:
+            dx = 0
+            dy = (half_height - abs(local_y) + body.radius) * (1 if local_y >= 0 else -1)
+        body.position = (x + dx * c - dy * s, y + dx * s + dy * c)
+        return True
+
+    def _in_contact(self):
+        return self._pushed
+
+    def _top_speed(self):
+        return max([hypot(*body.linear_velocity)
+                    for body in self.bodies if body.awake] or [0])
+
+    def _pushable(self, body):
+        # Driven and carried bodies push others aside, but are not pushed
+        return body.wheels is None and body.carrier is None
+
+    def _push_apart(self, a, b):
+        (ax, ay), (bx, by) = a.position, b.position
+        dx, dy = bx - ax, by - ay
+        distance = hypot(dx, dy)
+        overlap = a.radius + b.radius - distance
+        if overlap <= 0:
+            return []
+        if distance > 0:
+            nx, ny = dx / distance, dy / distance
+        else:
+            nx, ny = 1.0, 0.0
+        a_moves, b_moves = self._pushable(a), self._pushable(b)
+        if a_moves == b_moves:
+            a_share = b_share = overlap / 2
+        else:
+            a_share = overlap if a_moves else 0
+            b_share = overlap if b_moves else 0
+        moved = []
+        if a_share:
+            a.position = (ax - nx * a_share, ay - ny * a_share)
+            moved.append(a)
+        if b_share:
+            b.position = (bx + nx * b_share, by + ny * b_share)
+            moved.append(b)
+        return moved
+
+    def step(self, time_passed):
+        start = dict((body, body.position) for body in self.bodies)
+        moving = []
+        for body in self.bodies:
+            if body.wheels is not None and body.awake:
+                self._drive(body, time_passed)
+                moving.append(body)
+        for attachment in self.attachments:
+            attachment.place()
+            moving.append(attachment.carried)
+
+        # Push everything moved out of whatever it now overlaps, passing the
+        # push on to whatever that pushes in turn
+        self._pushed = False
+        for _ in range(PUSH_PASSES):
+            pushed = []
+            for body in moving:
+                for other in self.bodies:
+                    if other is body or (other.carrier is not None and
+                                         other.carrier.carrier is body) or \
+                            (body.carrier is not None and body.carrier.carrier is other):
+                        continue
+                    pushed.extend(self._push_apart(body, other))
+                for wall in self.static_bodies:
+                    if self._push_out_of_static(body, wall):
+                        self._pushed = True
+                if self._keep_in_bounds(body):
+                    self._pushed = True
+            if pushed:
+                self._pushed = True
+            moving = [body for body in pushed if self._pushable(body)]
+            if not moving:
+                break
+
+        for body in self.bodies:
+            if body.wheels is not None and body.awake:
+                continue
+            x, y = body.position
+            old_x, old_y = start[body]
+            if (x, y) != (old_x, old_y):
+                body.linear_velocity = ((x - old_x) / time_passed,
+                                        (y - old_y) / time_passed)
+                body.awake = True
+            elif body.wheels is None:
+                body.linear_velocity = (0.0, 0.0)
+                body.awake = False
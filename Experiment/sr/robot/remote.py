@@ -0,0 +1,253 @@
+"""
+Robot scripts running in processes of their own.
+
+Each robot talks to the simulator through one block of shared memory: the
+simulator publishes what the robot sees into a ring of observation slots
+after every tick, and the script writes its motor powers straight into the
+block. The rarer calls which change the world, ``grab`` and ``release``,
+are posted as requests and carried out by the simulator on its next tick.
+"""
+
+from __future__ import division
+
+import multiprocessing
+import os
+import signal
+import time
+from multiprocessing.sharedctypes import RawArray
+
+import numpy as np
+
+from .camera import Frame
+from .sim_robot import AlreadyHoldingSomethingException
+from .vision import (Marker, Point, PolarCoord, create_marker_info_by_type,
+                     MARKER_ARENA, MARKER_TOKEN_GOLD, MARKER_TOKEN_SILVER,
+                     MARKER_TOKEN_A, MARKER_TOKEN_B, MARKER_TOKEN_C)
+
+# Marker types by the number used for them in shared memory
+MARKER_TYPES = [MARKER_ARENA, MARKER_TOKEN_GOLD, MARKER_TOKEN_SILVER,
+                MARKER_TOKEN_A, MARKER_TOKEN_B, MARKER_TOKEN_C]
+
+# Enough that a reader is never overtaken while it reads the latest slot
+OBSERVATION_SLOTS = 4
+# Per slot: tick, timestamp, x, y, heading, marker count, then the markers
+SLOT_HEADER = 6
+# Per marker: type number, offset, distance, bearing in degrees
+MARKER_FIELDS = 4
+# m0, m1, request number, request kind, reply number, reply value
+COMMAND_FIELDS = 6
+
+REQUEST_GRAB = 1
+REQUEST_RELEASE = 2
+
+# Exceptions a request may raise for the script to catch, sent back as a
+# reply value of -1 for the first, -2 for the second and so on
+REQUEST_EXCEPTIONS = [AlreadyHoldingSomethingException]
+
+# How often a script waiting on the simulator checks for its answer
+POLL_INTERVAL = 0.001
+
+class SharedChannel(object):
+    """
+    Typed numpy views onto one robot's block of shared memory.
+    """
+
+    def __init__(self, max_markers, buffer=None):
+        self.max_markers = max_markers
+        slot_size = SLOT_HEADER + max_markers * MARKER_FIELDS
+        size = 1 + OBSERVATION_SLOTS * slot_size + COMMAND_FIELDS
+        if buffer is None:
+            buffer = RawArray('d', size)
+        self.buffer = buffer
+        memory = np.frombuffer(buffer, dtype=np.float64, count=size)
+        # Number of observations published so far
+        self.published = memory[0:1]
+        self.slots = memory[1:1 + OBSERVATION_SLOTS * slot_size].reshape(
+            OBSERVATION_SLOTS, slot_size)
+        self.command = memory[1 + OBSERVATION_SLOTS * slot_size:]
+
+    def publish(self, tick, timestamp, location, heading, markers):
+        count = int(self.published[0])
+        slot = self.slots[count % OBSERVATION_SLOTS]
+        markers = markers[:self.max_markers]
+        slot[0:SLOT_HEADER] = (tick, timestamp, location[0], location[1],
+                               heading, len(markers))
+        for i, marker in enumerate(markers):
+            start = SLOT_HEADER + i * MARKER_FIELDS
+            slot[start:start + MARKER_FIELDS] = (
+                MARKER_TYPES.index(marker.info.marker_type), marker.info.offset,
+                marker.dist, marker.rot_y)
+        # Only now may readers look at the slot
+        self.published[0] = count + 1
+
+    def read(self, reader):
+        """
+        Call ``reader(slot)`` on the latest observation, reading the shared
+        slot in place, and return its result. Retries if the simulator
+        reused the slot while it was being read.
+        """
+        while True:
+            count = int(self.published[0])
+            if count == 0:
+                time.sleep(POLL_INTERVAL)
+                continue
+            result = reader(self.slots[(count - 1) % OBSERVATION_SLOTS])
+            if int(self.published[0]) - count < OBSERVATION_SLOTS - 1:
+                return result
+
+
+class RemoteController(object):
+    """
+    Simulator controller running a robot script in a child process, against
+    the given SimRobot.
+    """
+
+    def __init__(self, simulator, robot, script):
+        self.simulator = simulator
+        self.robot = robot
+        self.script = script
+        # No robot can see more markers than the arena has
+        max_markers = sum(1 for obj in simulator.arena.objects
+                          if obj.marker_info is not None)
+        self.channel = SharedChannel(max_markers)
+        self._publish()
+        self.process = multiprocessing.Process(
+            target=run_remote_script,
+            args=(self.channel.buffer, max_markers, robot.zone, script))
+        self.process.daemon = True
+        self.process.start()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    @property
+    def exception(self):
+        if self.process.exitcode:
+            return RuntimeError("{0} exited with code {1}"
+                                .format(self.script, self.process.exitcode))
+        return None
+
+    def _publish(self):
+        frame = self.robot.see()
+        self.channel.publish(frame.number, frame.timestamp,
+                             self.robot.location, self.robot.heading, frame)
+
+    def step(self, time_passed):
+        command = self.channel.command
+        motor = self.robot.motors[0]
+        motor.m0.power, motor.m1.power = command[0], command[1]
+        request = command[2]
+        if request != command[4]:
+            try:
+                if command[3] == REQUEST_GRAB:
+                    result = self.robot.grab()
+                else:
+                    result = self.robot.release()
+            except tuple(REQUEST_EXCEPTIONS) as e:
+                # The script's problem, not the simulator's: raised again
+                # on its side of the channel
+                result = -1 - REQUEST_EXCEPTIONS.index(type(e))
+            command[5] = result
+            command[4] = request
+        self._publish()
+
+    def close(self):
+        if self.process.is_alive():
+            self.process.terminate()
+        self.process.join()
+
+
+## Child process side ##
+
+class RemoteMotorChannel(object):
+    def __init__(self, command, index):
+        self._command = command
+        self._index = index
+
+    @property
+    def power(self):
+        return self._command[self._index]
+
+    @power.setter
+    def power(self, value):
+        # Clamped again by the simulator, as for an in-process robot
+        self._command[self._index] = value
+
+class RemoteMotor(object):
+    def __init__(self, command):
+        self.serialnum = "SIM_MBv4"
+        self.m0 = RemoteMotorChannel(command, 0)
+        self.m1 = RemoteMotorChannel(command, 1)
+
+    def __repr__(self):
+        return "Motor( serialnum = \"{0}\" ) (Simulated Motor Board v4)" \
+               .format(self.serialnum)
+
+class RemoteRobot(object):
+    """
+    The ``Robot()`` of a script running in a child process, with the same
+    methods as a SimRobot.
+    """
+
+    def __init__(self, channel, zone):
+        self._channel = channel
+        self.zone = zone
+        self.motors = [RemoteMotor(channel.command)]
+
+    def _pose(self, slot):
+        return (float(slot[2]), float(slot[3])), float(slot[4])
+
+    @property
+    def location(self):
+        return self._channel.read(self._pose)[0]
+
+    @property
+    def heading(self):
+        return self._channel.read(self._pose)[1]
+
+    def see(self, res=(800, 600)):
+        def markers(slot):
+            tick, timestamp, count = int(slot[0]), float(slot[1]), int(slot[5])
+            found = []
+            for i in range(count):
+                start = SLOT_HEADER + i * MARKER_FIELDS
+                kind, offset, dist, rot_y = slot[start:start + MARKER_FIELDS].tolist()
+                info = create_marker_info_by_type(MARKER_TYPES[int(kind)], int(offset))
+                found.append(Marker(info=info,
+                                    centre=Point(PolarCoord(length=dist, rot_y=rot_y)),
+                                    res=res,
+                                    timestamp=timestamp))
+            return Frame(found, tick, res, timestamp)
+        return self._channel.read(markers)
+
+    def _request(self, kind):
+        command = self._channel.command
+        request = command[2] + 1
+        command[3] = kind
+        command[2] = request
+        while command[4] != request:
+            time.sleep(POLL_INTERVAL)
+        result = int(command[5])
+        if result < 0:
+            raise REQUEST_EXCEPTIONS[-1 - result]()
+        return bool(result)
+
+    def grab(self):
+        return self._request(REQUEST_GRAB)
+
+    def release(self):
+        return self._request(REQUEST_RELEASE)
+
+def run_remote_script(buffer, max_markers, zone, script):
+    channel = SharedChannel(max_markers, buffer)
+
+    def forward_interrupt(signum, frame):
+        # Scripts end the simulation by interrupting their own process,
+        # which is now this one rather than the simulator's
+        os.kill(os.getppid(), signal.SIGINT)
+        raise SystemExit(0)
+    signal.signal(signal.SIGINT, forward_interrupt)
+
+    with open(script) as f:
+        code = compile(f.read(), script, 'exec')
+    exec(code, {'Robot': lambda: RemoteRobot(channel, zone)})
@@ -0,0 +1,226 @@
+from __future__ import division
+
+import ast
+import os
+import threading
+import traceback
+
+from .clock import ThreadRetired, script_builtins
+from .remote import RemoteController
+from .sim_robot import SimRobot
+
+# Top-level functions which mark a script as tick-synchronous
+STEP_FUNCTION = 'step'
+GENERATOR_FUNCTION = 'controller'
+# Top-level coroutine function which marks a script as async
+ASYNC_FUNCTION = 'main'
+
+SCRIPT_THREADED = 'threaded'
+SCRIPT_STEP = 'step'
+SCRIPT_ASYNC = 'async'
+
+def place_robot(simulator, zone):
+    """
+    Create a SimRobot in the given starting zone.
+    """
+    with simulator.arena.physics_lock:
+        robot_object = SimRobot(simulator,
+                                location=simulator.arena.start_locations[zone],
+                                heading=simulator.arena.start_headings[zone])
+        robot_object.zone = zone
+        return robot_object
+
+# Compiled scripts by path, with the modification time they were compiled at
+_compiled_scripts = {}
+
+def compile_script(script):
+    """
+    Compile the script at the given path, or return the code compiled
+    before if the file has not changed since.
+    """
+    mtime = os.path.getmtime(script)
+    cached = _compiled_scripts.get(script)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(script) as f:
+        code = compile(f.read(), script, 'exec')
+    _compiled_scripts[script] = (mtime, code)
+    return code
+
+def _calls_robot(node):
+    """
+    Whether the statement calls ``Robot()`` when it runs, rather than in
+    some function or class it defines.
+    """
+    if isinstance(node, (ast.FunctionDef, ast.ClassDef, ast.Lambda)) or \
+            type(node).__name__ == 'AsyncFunctionDef':
+        return False
+    if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and
+            node.func.id == 'Robot'):
+        return True
+    return any(_calls_robot(child) for child in ast.iter_child_nodes(node))
+
+def script_kind(script):
+    """
+    How the script at the given path expects to be run: SCRIPT_THREADED for
+    a script calling ``Robot()`` at its top level to run its own loop, or
+    else SCRIPT_STEP if it defines a ``step`` or ``controller`` function at
+    its top level, SCRIPT_ASYNC if it defines ``async def main``, and
+    SCRIPT_THREADED again if it does neither.
+    """
+    with open(script) as f:
+        tree = ast.parse(f.read(), script)
+    # A threaded script may well have a helper called step of its own
+    if any(_calls_robot(node) for node in tree.body):
+        return SCRIPT_THREADED
+    for node in tree.body:
+        if (isinstance(node, ast.FunctionDef) and
+                node.name in (STEP_FUNCTION, GENERATOR_FUNCTION)):
+            return SCRIPT_STEP
+        if (type(node).__name__ == 'AsyncFunctionDef' and
+                node.name == ASYNC_FUNCTION):
+            return SCRIPT_ASYNC
+    return SCRIPT_THREADED
+
+class RobotThread(threading.Thread):
+    """
+    Runs one robot script against a simulator, with ``Robot()`` giving it a
+    SimRobot placed in the given starting zone.
+    """
+
+    def __init__(self, simulator, zone, script, *args, **kwargs):
+        super(RobotThread, self).__init__(*args, **kwargs)
+        self.simulator = simulator
+        self.zone = zone
+        self.script = script
+        self.exception = None
+        self.daemon = True
+
+    def run(self):
+        sim = self.simulator
+        # A reset gives the simulator a new clock; this thread stays on its own
+        clock = sim.clock
+
+        def robot():
+            return place_robot(sim, self.zone)
+
+        script_globals = {'Robot': robot}
+        if clock.virtual:
+            script_globals['__builtins__'] = script_builtins(clock)
+        try:
+            exec(compile_script(self.script), script_globals)
+        except ThreadRetired:
+            # The simulation was reset under the script; that is no error
+            pass
+        except BaseException as e:
+            # SystemExit included: a script calling exit() has given up
+            self.exception = e
+            raise
+        finally:
+            clock.unregister_thread(self)
+
+class StepController(object):
+    """
+    Runs a tick-synchronous robot script in the simulator's own thread.
+
+    The script defines either ``step(R, markers)``, called every
+    ``TICKS_PER_STEP`` physics ticks (default 1) with what the robot sees,
+    or a generator function ``controller(R)``, resumed on the same schedule
+    with each ``yield`` evaluating to what the robot sees. Either may give
+    back a ``(left, right)`` pair of motor powers, or None to leave the
+    motors as they are. The script must not sleep: the simulation waits
+    for it on every step.
+    """
+
+    def __init__(self, simulator, zone, script):
+        self.simulator = simulator
+        self.zone = zone
+        self.script = script
+        self.exception = None
+        self._finished = False
+        self._ticks = 0
+
+        self.robot = place_robot(simulator, zone)
+        script_globals = {}
+        exec(compile_script(script), script_globals)
+        self.ticks_per_step = script_globals.get('TICKS_PER_STEP', 1)
+        self._step_function = script_globals.get(STEP_FUNCTION)
+        self._generator = None
+        if GENERATOR_FUNCTION in script_globals:
+            self._generator = script_globals[GENERATOR_FUNCTION](self.robot)
+
+    def is_alive(self):
+        return not self._finished
+
+    def _command(self, markers):
+        if self._generator is None:
+            return self._step_function(self.robot, markers)
+        if self._ticks == self.ticks_per_step:
+            # Run the generator up to its first yield
+            return next(self._generator)
+        return self._generator.send(markers)
+
+    def step(self, time_passed):
+        if self._finished:
+            return
+        self._ticks += 1
+        if self._ticks % self.ticks_per_step:
+            return
+        try:
+            command = self._command(self.robot.see())
+        except StopIteration:
+            self._finished = True
+            return
+        except Exception as e:
+            self.exception = e
+            self._finished = True
+            traceback.print_exc()
+            return
+        if command is not None:
+            motor = self.robot.motors[0]
+            motor.m0.power, motor.m1.power = command
+
+def start_robots(simulator, scripts, processes=False):
+    """
+    Start each robot script, one per zone in order, as a StepController,
+    an AsyncController or a RobotThread according to its kind. Returns
+    them all.
+
+    With ``processes``, scripts which would have had a RobotThread instead
+    run in a child process each, through a RemoteController.
+
+    A script of None places a robot running no code, for the caller to
+    drive itself; its entry in the result is the SimRobot.
+    """
+    runners = []
+    scheduler = None
+    for zone, script in enumerate(scripts):
+        kind = script_kind(script) if script is not None else None
+        if kind is None:
+            runner = place_robot(simulator, zone)
+        elif kind == SCRIPT_STEP:
+            runner = StepController(simulator, zone, script)
+            simulator.attach_controller(runner)
+        elif kind == SCRIPT_ASYNC:
+            # Only Python 3 can import this
+            from .aio import AsyncController, AsyncScheduler
+            if scheduler is None:
+                scheduler = AsyncScheduler(simulator)
+                simulator.attach_controller(scheduler)
+            script_globals = {}
+            exec(compile_script(script), script_globals)
+            runner = AsyncController(scheduler, place_robot(simulator, zone),
+                                     script_globals[ASYNC_FUNCTION])
+        elif processes:
+            if simulator.clock.virtual:
+                raise ValueError("Robot processes cannot run on a virtual clock")
+            runner = RemoteController(simulator, place_robot(simulator, zone), script)
+            simulator.attach_controller(runner)
+        else:
+            runner = RobotThread(simulator, zone, script)
+            # Register before starting so a virtual clock cannot run ahead
+            # of a robot that has not reached its first sleep yet
+            simulator.clock.register_thread(runner)
+            runner.start()
+        runners.append(runner)
+    return runners
@@ -0,0 +1,126 @@
+"""
+Banks of pre-generated scenarios, so that every controller under test can
+face the very same layouts.
+
+A scenario is the starting pose of every object with a body which an arena
+places, tokens and obstacles, in the order the arena creates them. A bank
+holds many for one game config, as a float32 array of ``(x, y, heading)``
+in a NumPy ``.npz`` file, along with the config it was generated from:
+
+    bank = generate_bank({'game': 'two-colours-assignment'}, 1000)
+    bank.save('banks/two_colours_assignment.npz')
+
+A game config naming a bank in ``scenarios`` has each arena built from it
+take its starting poses from the scenario numbered by the trial's seed,
+wrapping around the end of the bank.
+"""
+
+from __future__ import division
+
+import copy
+import json
+import os
+
+import numpy as np
+
+# Config keys which do not change what an arena places
+IGNORED_OPTIONS = ('scenarios', 'physics', 'physics_profile', 'headless',
+                   'virtual_time', 'camera_ticks_per_frame', 'frames_per_second',
+                   'physics_rate')
+
+def placed_objects(arena):
+    """
+    The objects of the arena whose starting poses a scenario holds.
+    """
+    return [obj for obj in arena.objects if getattr(obj, '_body', None) is not None]
+
+def layout_config(config):
+    """
+    The parts of a game config which decide what its arenas place.
+    """
+    return dict((key, value) for key, value in config.items()
+                if key not in IGNORED_OPTIONS)
+
+class ScenarioBank(object):
+    def __init__(self, config, poses):
+        self.config = layout_config(config)
+        self.poses = poses
+
+    def __len__(self):
+        return len(self.poses)
+
+    def matches(self, config):
+        return layout_config(config) == self.config
+
+    def apply(self, arena, index):
+        """
+        Move the placed objects of a newly built arena to their starting
+        poses in the given scenario.
+        """
+        objects = placed_objects(arena)
+        poses = self.poses[index % len(self.poses)]
+        if len(objects) != len(poses):
+            raise ValueError("Scenarios place {0} objects but the arena has {1}"
+                             .format(len(poses), len(objects)))
+        with arena.physics_lock:
+            for obj, (x, y, heading) in zip(objects, poses.tolist()):
+                obj.location = (x, y)
+                obj.heading = heading
+
+    def save(self, path):
+        directory = os.path.dirname(path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        with open(path, 'wb') as f:
+            np.savez(f, poses=self.poses,
+                     config=np.array(json.dumps(self.config, sort_keys=True)))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(json.loads(str(data['config'])), data['poses'])
+
+# Loaded banks by path, with the modification time they were loaded at
+_loaded_banks = {}
+
+def load_bank(path):
+    """
+    Load the bank at the given path, or return the one loaded before if the
+    file has not changed since.
+    """
+    mtime = os.path.getmtime(path)
+    cached = _loaded_banks.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    bank = ScenarioBank.load(path)
+    _loaded_banks[path] = (mtime, bank)
+    return bank
+
+def generate_bank(config, count, base_seed=0):
+    """
+    Build ``count`` arenas of the given game config, seeded from
+    ``base_seed`` upwards, and return a bank of their starting poses.
+
+    Placement does not depend on the physics, so the arenas are built on
+    the kinematic backend, which is far quicker to create bodies in.
+    """
+    # Imported here as the simulator imports this module itself
+    from .simulator import DEFAULT_GAME, Simulator
+
+    config = dict(config)
+    config.setdefault('game', DEFAULT_GAME)
+    options = layout_config(copy.deepcopy(config))
+    options['physics'] = 'kinematic'
+    sim = None
+    poses = []
+    for seed in range(base_seed, base_seed + count):
+        if sim is None:
+            sim = Simulator(dict(options), background=False, headless=True,
+                            virtual_time=True, seed=seed)
+        else:
+            sim.reset(seed)
+        poses.append([(obj._body.position[0], obj._body.position[1], obj._body.angle)
+                      for obj in placed_objects(sim.arena)])
+    if sim is not None:
+        sim.close()
+    return ScenarioBank(config, np.array(poses, dtype=np.float32).reshape(count, -1, 3))
@@ -2,13 +2,14 @@
 
 from __future__ import division
 
-import time
-from math import pi, sin, cos, degrees, hypot, atan2
+from math import pi, degrees, hypot, atan2
 
+from .camera import Camera
+from .clock import ThreadRetired
 from .game_object import GameObject
 from .vision import Marker, Point, PolarCoord
 
-import pypybox2d
+import numpy as np
 
 SPEED_SCALE_FACTOR = 0.02
 MAX_MOTOR_SPEED = 100
@@ -19,6 +20,22 @@ HALF_FOV_WIDTH = pi / 6
 
 GRABBER_OFFSET = 0.25
 
+MOTION_BLUR_SPEED_THRESHOLD = 5
+
+def make_marker(info, rel_x, rel_y, heading, res, acq_time):
+    """
+    Make the Marker seen of an object at the given offset from a robot.
+    """
+    # Done with math rather than numpy, whose results can differ in the
+    # last bit
+    polar_coord = PolarCoord(length=hypot(rel_x, rel_y), \
+                             rot_y=degrees(atan2(rel_y, rel_x) - heading))
+    # TODO: Check polar coordinates are the right way around
+    return Marker(info=info,
+                  centre=Point(polar_coord),
+                  res=res,
+                  timestamp=acq_time)
+
 class AlreadyHoldingSomethingException(Exception):
     def __str__(self):
         return "The robot is already holding something."
@@ -34,9 +51,10 @@ class MotorChannel(object):
 
     @power.setter
     def power(self, value):
-        value = min(max(value, -MAX_MOTOR_SPEED), MAX_MOTOR_SPEED)
-        with self._robot.lock:
-            self._power = value
+        self._robot._clock.checkpoint()
+        # A single attribute store needs no lock: the robot's tick reads
+        # each power once and uses whichever command was set last
+        self._power = min(max(value, -MAX_MOTOR_SPEED), MAX_MOTOR_SPEED)
 
 class Motor:
     """Represents a motor board."""
@@ -57,15 +75,16 @@ class SimRobot(GameObject):
     width = 0.45
 
     surface_name = 'sr/robot.png'
+    blurs_when_moving = True
 
     _holding = None
+    _retired = False
 
     ## Constructor ##
 
     @property
     def location(self):
-        with self.lock:
-            return self._body.position
+        return self._pose()[0]
 
     @location.setter
     def location(self, new_pos):
@@ -73,11 +92,11 @@ class SimRobot(GameObject):
             return # Slight hack: deal with the initial setting from the constructor
         with self.lock:
             self._body.position = new_pos
+        self.arena.object_moved(self)
 
     @property
     def heading(self):
-        with self.lock:
-            return self._body.angle
+        return self._pose()[1]
 
     @heading.setter
     def heading(self, _new_heading):
@@ -85,66 +104,102 @@ class SimRobot(GameObject):
             return # Slight hack: deal with the initial setting from the constructor
         with self.lock:
             self._body.angle = _new_heading
+        self.arena.object_moved(self)
 
-    def __init__(self, simulator):
+    def __init__(self, simulator, location=(0,0), heading=0):
         self._body = None
         self.zone = 0
+        self._clock = simulator.clock
         super(SimRobot, self).__init__(simulator.arena)
         self.motors = [Motor(self)]
-        make_body = simulator.arena._physics_world.create_body
+        self.camera = Camera(simulator.arena, self._clock, self._capture,
+                             simulator.camera_ticks_per_frame)
         half_width = self.width * 0.5
         with self.arena.physics_lock:
-            self._body = make_body(position=(0, 0),
-                                   angle=0,
-                                   linear_damping=0.0,
-                                   angular_damping=0.0,
-                                   type=pypybox2d.body.Body.DYNAMIC)
-            self._body.create_polygon_fixture([(-half_width, -half_width),
-                                               ( half_width, -half_width),
-                                               ( half_width,  half_width),
-                                               (-half_width,  half_width)],
-                                              density=500*0.12) # MDF @ 12cm thickness
+            self._body = self.arena.physics.create_body((half_width, half_width),
+                                                        density=500*0.12, # MDF @ 12cm thickness
+                                                        position=location,
+                                                        angle=heading)
         simulator.arena.objects.append(self)
 
 
     ## Internal methods ##
 
-    def _apply_wheel_force(self, y_position, power):
-        location_world_space = self._body.get_world_point((0, y_position))
-        force_magnitude = power * 0.6
-        # account for friction
-        frict_world = self._body.get_linear_velocity_from_local_point((0, y_position))
-        frict_x, frict_y = self._body.get_local_vector(frict_world)
-        force_magnitude -= frict_x * 50.2
-        force_world_space = (force_magnitude * cos(self.heading),
-                             force_magnitude * sin(self.heading))
-        self._body.apply_force(force_world_space, location_world_space)
+    def retire(self):
+        """
+        Called when the simulation is reset. Its bodies now belong to the
+        next trial, so the script's next call to this robot ends it.
+        """
+        self._retired = True
+
+    def _check_retired(self):
+        if self._retired:
+            raise ThreadRetired("This robot's simulation has been reset")
+
+    def _pose(self, state=None):
+        # Read from the arena's published snapshot rather than the body,
+        # which the physics step may be halfway through updating
+        if state is None:
+            state = self.arena.object_state()
+        pose = state.pose(self)
+        if pose is None:
+            return tuple(self._body.position), self._body.angle
+        return pose
+
+    def _capture(self, res, acq_time):
+        state = self.arena.object_state()
+        (x, y), heading = self._pose(state)
+        own_row = state.rows.get(self)
+
+        # Simple approximation: we can't see anything if either it's moving
+        # or we're moving. This doesn't handle tokens grabbed by other robots
+        # but Sod's Law says we're likely to see those anyway.
+        if own_row is not None and state.speeds[own_row] > MOTION_BLUR_SPEED_THRESHOLD:
+            return []
+        blurred = state.blurs & (state.speeds > MOTION_BLUR_SPEED_THRESHOLD)
+
+        # Choose only marked objects within the field of view, all at once.
+        # The view has no range limit, so from the edge of the arena it takes
+        # in most objects anyway: one pass over every row is far cheaper than
+        # gathering candidates from the spatial index first
+        rel_x = state.locations[:, 0] - x
+        rel_y = state.locations[:, 1] - y
+        offsets = np.arctan2(rel_y, rel_x) - heading
+        visible = (state.marked & ~blurred &
+                   (-HALF_FOV_WIDTH < offsets) & (offsets < HALF_FOV_WIDTH))
+        if own_row is not None:
+            visible[own_row] = False
+
+        return [make_marker(state.objects[row].marker_info,
+                            float(rel_x[row]), float(rel_y[row]),
+                            heading, res, acq_time)
+                for row in np.flatnonzero(visible).tolist()]
 
     ## "Public" methods for simulator code ##
 
+    @property
+    def idle(self):
+        # With the motors off, a resting robot has no forces to apply; any
+        # tick would only wake its body back up
+        motor = self.motors[0]
+        return (motor.m0.power == 0 and motor.m1.power == 0 and
+                not self._body.awake)
+
     def tick(self, time_passed):
-        with self.lock, self.arena.physics_lock:
-            half_width = self.width * 0.5
-            # left wheel
-            self._apply_wheel_force(-half_width, self.motors[0].m0.power)
-            # right wheel
-            self._apply_wheel_force( half_width, self.motors[0].m1.power)
-            # kill the lateral velocity
-            right_normal = self._body.get_world_vector((0, 1))
-            lateral_vel = (right_normal.dot(self._body.linear_velocity) *
-                           right_normal)
-            impulse = self._body.mass * -lateral_vel
-            self._body.apply_linear_impulse(impulse, self._body.world_center)
+        # The arena calls this holding physics_lock
+        motor = self.motors[0]
+        self.arena.physics.drive(self._body, self.width * 0.5,
+                                 motor.m0.power, motor.m1.power)
 
     ## "Public" methods for user code ##
 
     def grab(self):
+        self._check_retired()
+        self._clock.checkpoint()
         if self._holding is not None:
             raise AlreadyHoldingSomethingException()
 
-        with self.lock:
-            x, y = self.location
-            heading = self.heading
+        (x, y), heading = self._pose()
 
         def object_filter(o):
             rel_x, rel_y = (o.location[0] - x, o.location[1] - y)
@@ -154,26 +209,28 @@ class SimRobot(GameObject):
                     -HALF_GRAB_SECTOR_WIDTH < direction - heading < HALF_GRAB_SECTOR_WIDTH and
                     not o.grabbed)
 
-        objects = list(filter(object_filter, self.arena.objects))
+        candidates = self.arena.objects_near(x, y, GRAB_RADIUS)
+        objects = list(filter(object_filter, candidates))
         if objects:
             self._holding = objects[0]
             if hasattr(self._holding, '_body'):
                 with self.lock, self.arena.physics_lock:
-                    self._holding_joint = self._body._world.create_weld_joint(self._body,
-                                                                              self._holding._body,
-                                                                              local_anchor_a=(GRABBER_OFFSET, 0),
-                                                                              local_anchor_b=(0, 0))
+                    self._holding_joint = self.arena.physics.attach(self._body,
+                                                                    self._holding._body,
+                                                                    GRABBER_OFFSET)
             self._holding.grab()
             return True
         else:
             return False
 
     def release(self):
+        self._check_retired()
+        self._clock.checkpoint()
         if self._holding is not None:
             self._holding.release()
             if hasattr(self._holding, '_body'):
                 with self.lock, self.arena.physics_lock:
-                    self._body.world.destroy_joint(self._holding_joint)
+                    self.arena.physics.detach(self._holding_joint)
                 self._holding_joint = None
             self._holding = None
             return True
@@ -181,42 +238,6 @@ class SimRobot(GameObject):
             return False
 
     def see(self, res=(800,600)):
-        with self.lock:
-            x, y = self.location
-            heading = self.heading
-
-        acq_time = time.time()
-
-        MOTION_BLUR_SPEED_THRESHOLD = 5
-
-        def robot_moving(o):
-            vx, vy = o._body.linear_velocity
-            return hypot(vx, vy) > MOTION_BLUR_SPEED_THRESHOLD
-
-        def motion_blurred(o):
-            # Simple approximation: we can't see anything if either it's moving
-            # or we're moving. This doesn't handle tokens grabbed by other robots
-            # but Sod's Law says we're likely to see those anyway.
-            return (robot_moving(self) or
-                    isinstance(o, SimRobot) and robot_moving(o))
-
-        def object_filter(o):
-            # Choose only marked objects within the field of view
-            direction = atan2(o.location[1] - y, o.location[0] - x)
-            return (o.marker_info != None and
-                    o is not self and
-                    -HALF_FOV_WIDTH < direction - heading < HALF_FOV_WIDTH and
-                    not motion_blurred(o))
-
-        def marker_map(o):
-            # Turn a marked object into a Marker
-            rel_x, rel_y = (o.location[0] - x, o.location[1] - y)
-            polar_coord = PolarCoord(length=hypot(rel_x, rel_y), \
-                                     rot_y=degrees(atan2(rel_y, rel_x) - heading))
-            # TODO: Check polar coordinates are the right way around
-            return Marker(info=o.marker_info,
-                          centre=Point(polar_coord),
-                          res=res,
-                          timestamp=acq_time)
-
-        return [marker_map(obj) for obj in self.arena.objects if object_filter(obj)]
+        self._check_retired()
+        self._clock.checkpoint()
+        return self.camera.frame(res)
@@ -1,57 +1,297 @@
 from __future__ import division
 
+import random
 import threading
-import pygame
+import time
 
-from .arenas import PiratePlunderArena, CTFArena, SunnySideUpArena, ABCArena, CalderaArena, TwoColoursArena, TwoColoursAssignmentArena
-from .display import Display
+from .clock import SimClock, WallClock
+from .physics import DEFAULT_PHYSICS
+from .scenario_bank import load_bank
+from .arenas import PiratePlunderArena, CTFArena, SunnySideUpArena, ABCArena, CalderaArena, TwoColoursArena, TwoColoursAssignmentArena, ProceduralArena
 
 DEFAULT_GAME = 'caldera'
 
+# Physics steps to run before rendering again, however far behind real time
+MAX_PHYSICS_STEPS_PER_PASS = 5
+
+# Real seconds a reset waits for retired robot threads to finish
+RETIRE_TIMEOUT = 1
+
 GAMES = {'caldera': CalderaArena,
          'pirate-plunder': PiratePlunderArena,
          'ctf': CTFArena,
          'sunny-side-up': SunnySideUpArena,
          'abc': ABCArena,
          'two-colours': TwoColoursArena,
-         'two-colours-assignment': TwoColoursAssignmentArena
+         'two-colours-assignment': TwoColoursAssignmentArena,
+         'procedural': ProceduralArena
         }
 
 class Simulator(object):
-    def __init__(self, config={}, size=(8, 8), frames_per_second=30, background=True):
+    def __init__(self, config={}, size=(8, 8), frames_per_second=30, background=True,
+                 headless=False, virtual_time=False, camera_ticks_per_frame=1,
+                 physics_rate=None, seed=None):
         try:
             game_name = config['game']
             del config['game']
         except KeyError:
             game_name = DEFAULT_GAME
-        game = GAMES[game_name]
-        self.arena = game(**config)
+        # Simulator options may also come from the game file; the arena must not see them
+        headless = config.pop('headless', False) or headless
+        virtual_time = config.pop('virtual_time', False) or virtual_time
+        self.camera_ticks_per_frame = config.pop('camera_ticks_per_frame',
+                                                 camera_ticks_per_frame)
+        frames_per_second = config.pop('frames_per_second', frames_per_second)
+        physics_rate = config.pop('physics_rate', physics_rate)
+        if seed is not None:
+            # For robot code drawing on the shared generator; the arena
+            # draws its layout from one of its own
+            random.seed(seed)
+        self.arena = None
+        self._build_arena(game_name, config, seed)
+
+        self.clock = SimClock() if virtual_time else WallClock()
 
-        self.display = Display(self.arena)
+        self.observers = []
+        self.controllers = []
+        self.headless = headless
+        if headless:
+            self.display = None
+        else:
+            # Imported here so that headless runs never load pygame
+            from .display import Display
+            self.display = Display(self.arena)
+            self.attach_observer(self.display)
 
         self.background = background
+        # The render rate; physics steps at its own, fixed, rate
         self.frames_per_second = frames_per_second
+        self.physics_rate = physics_rate if physics_rate is not None else frames_per_second
+        self.time_simulated = 0
+        self._start_time = None
+        self._stop_event = threading.Event()
 
         if self.background:
             self._loop_thread = threading.Thread(target=self._main_loop, args=(frames_per_second,))
             self._loop_thread.setDaemon(True)
             self._loop_thread.start()
 
-    def run(self):
+    def attach_observer(self, observer):
+        """
+        Register an object to be notified once per rendered frame.
+
+        The observer's ``update()`` is called with no arguments and may return
+        False to stop the simulation. If it has a ``close()`` method, that is
+        called when the main loop exits.
+        """
+        self.observers.append(observer)
+
+    def detach_observer(self, observer):
+        self.observers.remove(observer)
+
+    def attach_controller(self, controller):
+        """
+        Register an object whose ``step(time_passed)`` is called after every
+        physics step, in the main loop's thread. As with observers, any
+        ``close()`` method is called when the main loop exits.
+        """
+        self.controllers.append(controller)
+
+    def detach_controller(self, controller):
+        self.controllers.remove(controller)
+
+    def _build_arena(self, game_name, arena_config, seed=None):
+        game = GAMES[game_name]
+        options = dict(arena_config)
+        scenarios = options.pop('scenarios', None)
+        previous = self.arena
+        if (type(previous) is game and
+                options.get('physics', DEFAULT_PHYSICS) == previous.physics.name):
+            options['physics'] = previous.physics
+        if seed is not None:
+            options['seed'] = seed
+        self.arena = game(**options)
+        if scenarios is not None:
+            bank = load_bank(scenarios)
+            if not bank.matches(dict(arena_config, game=game_name)):
+                raise ValueError("Scenarios in {0} were generated for another game config"
+                                 .format(scenarios))
+            bank.apply(self.arena, seed if seed is not None else 0)
+        self._game_name = game_name
+        self._arena_config = arena_config
+
+    def reset(self, seed=None, config=None):
+        """
+        Start a new trial in this simulator, seeding the new arena's layout
+        and ``random`` if a seed is given, then start robots again with
+        ``start_robots``.
+
+        The robots of the last trial are retired: their scripts end at their
+        next sleep or call to the robot, and the controllers are closed.
+        The game stays the same unless a new config names another; another
+        arena of the same game is built on the old one's physics world,
+        walls and bodies. A config may also change the simulator options,
+        apart from ``headless`` and ``virtual_time``. The seed also picks the
+        scenario, if the config names a bank of them. The display, if any,
+        shows the new arena.
+        """
+        if self.background:
+            raise RuntimeError('Simulator runs in the background, so cannot be reset. '
+                               'Try passing background=False')
+        for obj in self.arena.objects:
+            if hasattr(obj, 'retire'):
+                obj.retire()
+        for controller in self.controllers:
+            if hasattr(controller, 'close'):
+                controller.close()
+        self.controllers = []
+        self.clock.retire(RETIRE_TIMEOUT)
+        self.clock = SimClock() if self.clock.virtual else WallClock()
+
+        game_name, arena_config = self._game_name, self._arena_config
+        if config is not None:
+            arena_config = dict(config)
+            game_name = arena_config.pop('game', DEFAULT_GAME)
+            arena_config.pop('headless', None)
+            arena_config.pop('virtual_time', None)
+            self.camera_ticks_per_frame = arena_config.pop('camera_ticks_per_frame',
+                                                           self.camera_ticks_per_frame)
+            self.frames_per_second = arena_config.pop('frames_per_second',
+                                                      self.frames_per_second)
+            self.physics_rate = arena_config.pop('physics_rate', self.physics_rate)
+        if seed is not None:
+            random.seed(seed)
+        self._build_arena(game_name, arena_config, seed)
+        if self.display is not None:
+            self.display.show(self.arena)
+
+        self.time_simulated = 0
+        self._start_time = None
+        self._stop_event.clear()
+
+    def close(self):
+        """
+        Close every observer, the display among them. A simulator running
+        in the background does this itself when its main loop ends; any
+        other may be reset and run again until this is called.
+        """
+        for observer in self.observers:
+            if hasattr(observer, 'close'):
+                observer.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def lag(self):
+        """
+        How many seconds simulated time is behind real time, since the main
+        loop started. Negative when running faster than real time.
+        """
+        if self._start_time is None:
+            return 0
+        return (time.time() - self._start_time) - self.time_simulated
+
+    def run(self, duration=None):
+        """
+        Run the main loop until stopped or, if given, until ``duration``
+        seconds have been simulated.
+        """
         if self.background:
             raise RuntimeError('Simulator runs in the background. Try passing background=False')
-        self._main_loop(self.frames_per_second)
+        self._main_loop(self.frames_per_second, duration)
+
+    def _notify_observers(self):
+        keep_running = True
+        for observer in list(self.observers):
+            if observer.update() is False:
+                keep_running = False
+        return keep_running
+
+    def _advance(self, time_passed):
+        self.arena.tick(time_passed)
+        self.clock.advance(time_passed)
+        self.time_simulated += time_passed
 
-    def _main_loop(self, frames_per_second):
-        clock = pygame.time.Clock()
+    def _run_controllers(self, time_passed):
+        for controller in list(self.controllers):
+            controller.step(time_passed)
+
+    def _step(self, time_passed):
+        self._advance(time_passed)
+        self._run_controllers(time_passed)
+
+    def _next_time_step(self):
+        return self.arena.next_time_step(1 / self.physics_rate)
+
+    def _controller_deadlines(self):
+        # Controllers with timers of their own, like the asyncio loop, say
+        # when the next is due so that steps can end on it
+        deadlines = []
+        for controller in self.controllers:
+            if hasattr(controller, 'next_deadline'):
+                deadline = controller.next_deadline()
+                if deadline is not None:
+                    deadlines.append(deadline)
+        return deadlines
+
+    def _main_loop(self, frames_per_second, duration=None):
+        render_step = 1 / frames_per_second
+        self._start_time = previous = time.time()
+        next_render = 0 if self.clock.virtual else previous
+        accumulator = 0
+        warned_lag = 0
+        time_step = self._next_time_step()
+
+        try:
+            while not self._stop_event.is_set():
+                if self.clock.virtual:
+                    # Wait for robot code to block on simulated time, then
+                    # step no further than it needs to
+                    self.clock.wait_until_idle()
+                    self._step(self.clock.next_step(self._next_time_step(),
+                                                    self._controller_deadlines()))
+                else:
+                    # Simulate whole steps for the real time which has
+                    # passed, carrying the remainder to the next pass
+                    now = time.time()
+                    accumulator += now - previous
+                    previous = now
+                    steps = 0
+                    while accumulator >= time_step:
+                        if steps == MAX_PHYSICS_STEPS_PER_PASS:
+                            # Too far behind to catch up; let simulated time slip
+                            accumulator %= time_step
+                            if self.lag - warned_lag >= 1:
+                                warned_lag = self.lag
+                                print("WARNING: simulation is running {0:.1f}s behind real time."
+                                      .format(warned_lag))
+                            break
+                        self._step(time_step)
+                        accumulator -= time_step
+                        steps += 1
+                        time_step = self._next_time_step()
 
-        while True:
-            if any(event.type == pygame.QUIT
-                    or (event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE)
-                    for event in pygame.event.get()):
-                break
+                if duration is not None and self.time_simulated >= duration:
+                    break
 
-            self.display.tick(1/frames_per_second)
-            clock.tick(frames_per_second)
+                # Observers may stop the simulation, so on a virtual clock
+                # they are updated by simulated time to keep that repeatable
+                now = self.time_simulated if self.clock.virtual else time.time()
+                if now >= next_render:
+                    if not self._notify_observers():
+                        break
+                    # Skip frames we are too late for rather than bunching them up
+                    next_render = max(next_render + render_step, now)
 
-        pygame.quit()
+                if not self.clock.virtual:
+                    next_step = previous + time_step - accumulator
+                    delay = min(next_step, next_render) - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+        finally:
+            for controller in self.controllers:
+                if hasattr(controller, 'close'):
+                    controller.close()
+            if self.background:
+                self.close()
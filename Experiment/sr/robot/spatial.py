@@ -0,0 +1,156 @@
+from __future__ import division
+
+from math import floor
+
+import random
+
+class SpatialGrid(object):
+    """
+    A uniform grid of objects bucketed by location, for finding candidates
+    near a point without scanning every object.
+
+    Each cell holds a tuple which is replaced, never modified, on update so
+    that readers in other threads may iterate a cell without locking. The
+    candidates returned are a superset of the objects actually matching;
+    callers still apply their own exact test.
+    """
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._keys = {}
+        # Insertion order, so that results can be reported in a stable order
+        self._order = {}
+
+    def __contains__(self, obj):
+        return obj in self._keys
+
+    def __len__(self):
+        return len(self._keys)
+
+    def _key(self, location):
+        x, y = location
+        return (int(floor(x / self.cell_size)), int(floor(y / self.cell_size)))
+
+    def insert(self, obj, location):
+        if obj not in self._order:
+            self._order[obj] = len(self._order)
+        self.update(obj, location)
+
+    def update(self, obj, location):
+        key = self._key(location)
+        old_key = self._keys.get(obj)
+        if key == old_key:
+            return
+        if old_key is not None:
+            remaining = tuple(o for o in self._cells[old_key] if o is not obj)
+            if remaining:
+                self._cells[old_key] = remaining
+            else:
+                del self._cells[old_key]
+        self._cells[key] = self._cells.get(key, ()) + (obj,)
+        self._keys[obj] = key
+
+    def remove(self, obj):
+        key = self._keys.pop(obj, None)
+        self._order.pop(obj, None)
+        if key is None:
+            return
+        remaining = tuple(o for o in self._cells[key] if o is not obj)
+        if remaining:
+            self._cells[key] = remaining
+        else:
+            del self._cells[key]
+
+    def clear(self):
+        self._cells = {}
+        self._keys = {}
+        self._order = {}
+
+    def _collect(self, keys):
+        cells = self._cells
+        found = []
+        for key in keys:
+            found.extend(cells.get(key, ()))
+        order = self._order
+        found.sort(key=lambda o: order.get(o, -1))
+        return found
+
+    def near(self, x, y, radius):
+        """
+        Return the objects in cells within ``radius`` of the given point.
+        """
+        min_i, min_j = self._key((x - radius, y - radius))
+        max_i, max_j = self._key((x + radius, y + radius))
+        return self._collect((i, j)
+                             for i in range(min_i, max_i + 1)
+                             for j in range(min_j, max_j + 1))
+
+
+class DiscSampler(object):
+    """
+    Places non-overlapping shapes, each a set of discs, at random inside a
+    rectangle by rejection sampling. Placed discs are bucketed into a grid
+    so that a candidate is only tested against its neighbours, which keeps
+    each placement close to constant time however many there are.
+    """
+
+    def __init__(self, left, top, right, bottom, cell_size, rng=None):
+        self.left, self.top = left, top
+        self.right, self.bottom = right, bottom
+        self.cell_size = cell_size
+        self._random = rng if rng is not None else random
+        self._cells = {}
+        self._max_radius = 0
+
+    def _overlaps(self, x, y, radius):
+        size = self.cell_size
+        reach = radius + self._max_radius
+        min_i, max_i = int(floor((x - reach) / size)), int(floor((x + reach) / size))
+        min_j, max_j = int(floor((y - reach) / size)), int(floor((y + reach) / size))
+        get = self._cells.get
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                cell = get((i, j))
+                if cell is None:
+                    continue
+                for other_x, other_y, other_radius in cell:
+                    gap = radius + other_radius
+                    dx, dy = x - other_x, y - other_y
+                    if dx * dx + dy * dy < gap * gap:
+                        return True
+        return False
+
+    def add(self, x, y, radius):
+        """
+        Mark a disc as taken, whether or not it overlaps any other.
+        """
+        key = (int(floor(x / self.cell_size)), int(floor(y / self.cell_size)))
+        self._cells.setdefault(key, []).append((x, y, radius))
+        self._max_radius = max(self._max_radius, radius)
+
+    def place(self, discs, attempts):
+        """
+        Find a random point at which the shape made of ``discs``, given as
+        ``(x, y, radius)`` relative to the point, lies inside the rectangle
+        clear of everything placed so far. The point is returned and its
+        discs marked as taken, or None if no attempt found room.
+        """
+        extent_x = max(abs(dx) + radius for dx, dy, radius in discs)
+        extent_y = max(abs(dy) + radius for dx, dy, radius in discs)
+        low_x, high_x = self.left + extent_x, self.right - extent_x
+        low_y, high_y = self.top + extent_y, self.bottom - extent_y
+        if low_x > high_x or low_y > high_y:
+            return None
+        uniform = self._random.uniform
+        overlaps = self._overlaps
+        for _ in range(attempts):
+            x, y = uniform(low_x, high_x), uniform(low_y, high_y)
+            for dx, dy, radius in discs:
+                if overlaps(x + dx, y + dy, radius):
+                    break
+            else:
+                for dx, dy, radius in discs:
+                    self.add(x + dx, y + dy, radius)
+                return (x, y)
+        return None
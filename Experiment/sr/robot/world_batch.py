@@ -0,0 +1,189 @@
+"""
+Many independent worlds stepped together in one process.
+
+Each world is a headless Simulator on its own virtual clock, seeded on
+creation. The physics of each world is still stepped by its own Box2D
+world, but vision for every robot in every world is computed in one
+batched NumPy pass per tick, and handed to the robots' cameras so that
+``see()`` returns it without capturing again.
+"""
+
+from __future__ import division
+
+import copy
+
+import numpy as np
+
+from .runner import SCRIPT_THREADED, script_kind, start_robots
+from .sim_robot import (HALF_FOV_WIDTH, MOTION_BLUR_SPEED_THRESHOLD,
+                        SimRobot, make_marker)
+from .simulator import Simulator
+
+def capture_all(robots, res=(800, 600)):
+    """
+    Capture what each of the given robots sees, batched over all of them,
+    and supply it to their cameras. The robots may be spread over any
+    number of arenas. Returns the frames, in the same order.
+    """
+    if not robots:
+        return []
+    arenas = []
+    arena_index = {}
+    for robot in robots:
+        if robot.arena not in arena_index:
+            arena_index[robot.arena] = len(arenas)
+            arenas.append(robot.arena)
+    states = [arena.object_state() for arena in arenas]
+
+    # Pad every arena's objects out to the same count; padding is unmarked
+    width = max(len(state.objects) for state in states) if states else 0
+    locations = np.zeros((len(states), width, 2))
+    seeable = np.zeros((len(states), width), dtype=bool)
+    for i, state in enumerate(states):
+        count = len(state.objects)
+        blurred = state.blurs & (state.speeds > MOTION_BLUR_SPEED_THRESHOLD)
+        locations[i, :count] = state.locations
+        seeable[i, :count] = state.marked & ~blurred
+
+    # One row per robot: where it is, and which arena it is in
+    worlds = np.array([arena_index[robot.arena] for robot in robots], dtype=np.intp)
+    poses = [robot._pose(states[world]) for robot, world in zip(robots, worlds)]
+    xs = np.array([[x] for (x, y), heading in poses])
+    ys = np.array([[y] for (x, y), heading in poses])
+    headings = np.array([[heading] for location, heading in poses])
+
+    rel_x = locations[worlds, :, 0] - xs
+    rel_y = locations[worlds, :, 1] - ys
+    offsets = np.arctan2(rel_y, rel_x) - headings
+    visible = (seeable[worlds] &
+               (-HALF_FOV_WIDTH < offsets) & (offsets < HALF_FOV_WIDTH))
+
+    frames = []
+    for n, robot in enumerate(robots):
+        state = states[worlds[n]]
+        own_row = state.rows.get(robot)
+        markers = []
+        # As in SimRobot._capture, a robot moving fast sees nothing
+        if own_row is None or state.speeds[own_row] <= MOTION_BLUR_SPEED_THRESHOLD:
+            if own_row is not None:
+                visible[n, own_row] = False
+            heading = poses[n][1]
+            timestamp = robot._clock.time()
+            markers = [make_marker(state.objects[row].marker_info,
+                                   float(rel_x[n, row]), float(rel_y[n, row]),
+                                   heading, res, timestamp)
+                       for row in np.flatnonzero(visible[n]).tolist()]
+        else:
+            timestamp = robot._clock.time()
+        robot.camera.supply(markers, res, timestamp)
+        frames.append(robot.camera.frame(res))
+    return frames
+
+
+class WorldBatch(object):
+    """
+    One world per seed, each running the same game and robot scripts.
+
+    Scripts must be step or async scripts, which the batch drives itself;
+    a script of None places a robot for the caller to drive through
+    ``step(powers)``.
+    """
+
+    def __init__(self, config, seeds, scripts=(), physics_rate=None, res=(800, 600)):
+        for script in scripts:
+            if script is not None and script_kind(script) == SCRIPT_THREADED:
+                raise ValueError("{0} needs a thread of its own; only step and "
+                                 "async scripts can run in a batch".format(script))
+        self.seeds = list(seeds)
+        self.scripts = list(scripts)
+        self.res = res
+        self.worlds = []
+        self.runners = []
+        for seed in self.seeds:
+            world = Simulator(copy.deepcopy(config), background=False,
+                              headless=True, virtual_time=True,
+                              physics_rate=physics_rate, seed=seed)
+            self.worlds.append(world)
+            self.runners.append(start_robots(world, self.scripts))
+        self._find_robots()
+
+    def _find_robots(self):
+        self.robots = [[obj for obj in world.arena.objects if isinstance(obj, SimRobot)]
+                       for world in self.worlds]
+        # Simulated time at which each world's scripts had all finished
+        self.finished_at = [None] * len(self.worlds)
+
+    def reset(self, seeds, config=None):
+        """
+        Start every world again from the given seeds, one per world, and if
+        given a new game config, reusing each world's physics as
+        ``Simulator.reset`` does.
+        """
+        self.seeds = list(seeds)
+        self.runners = []
+        for world, seed in zip(self.worlds, self.seeds):
+            world.reset(seed, copy.deepcopy(config) if config is not None else None)
+            self.runners.append(start_robots(world, self.scripts))
+        self._find_robots()
+
+    def _running(self, index):
+        return self.finished_at[index] is None
+
+    def _has_scripts(self, index):
+        return any(runner is not None and hasattr(runner, 'is_alive')
+                   for runner in self.runners[index])
+
+    def see(self):
+        """
+        Return what every robot sees, as a list per world of a frame per
+        robot.
+        """
+        robots = [robot for world_robots in self.robots for robot in world_robots]
+        frames = iter(capture_all(robots, self.res))
+        return [[next(frames) for robot in world_robots]
+                for world_robots in self.robots]
+
+    def step(self, powers=None):
+        """
+        Advance every running world by one physics step, whose length each
+        world's physics profile chooses. ``powers``, if given, holds a
+        ``(left, right)`` pair of motor powers for each robot of each world,
+        applied before the step.
+        """
+        running = [i for i in range(len(self.worlds)) if self._running(i)]
+        if powers is not None:
+            for i in running:
+                for robot, (left, right) in zip(self.robots[i], powers[i]):
+                    motor = robot.motors[0]
+                    motor.m0.power, motor.m1.power = left, right
+
+        time_steps = {}
+        for i in running:
+            time_steps[i] = self.worlds[i]._next_time_step()
+            self.worlds[i]._advance(time_steps[i])
+
+        scripted = [i for i in running if self._has_scripts(i)]
+        if scripted:
+            # Scripts are sure to look, so see for all of them at once
+            capture_all([robot for i in scripted for robot in self.robots[i]], self.res)
+            for i in scripted:
+                world = self.worlds[i]
+                world._run_controllers(time_steps[i])
+                if not any(runner.is_alive() for runner in self.runners[i]
+                           if hasattr(runner, 'is_alive')):
+                    self.finished_at[i] = world.time_simulated
+
+    def run(self, duration):
+        """
+        Step every world until its scripts finish or ``duration`` seconds
+        have been simulated in it.
+        """
+        while any(self._running(i) and self.worlds[i].time_simulated < duration
+                  for i in range(len(self.worlds))):
+            self.step()
+
+    def close(self):
+        for world in self.worlds:
+            for controller in world.controllers:
+                if hasattr(controller, 'close'):
+                    controller.close()
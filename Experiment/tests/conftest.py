@@ -0,0 +1,13 @@
+"""
+Puts the simulator on the path as run.py and batch.py do, so that the
+tests can import it however pytest is started.
+"""
+
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for path in (ROOT, os.path.join(ROOT, 'sr/robot'), os.path.join(ROOT, 'sr/robot/arenas')):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
@@ -0,0 +1,257 @@
+"""
+Tests of analysis.py: reading results, and its statistics against
+published tables and examples worked by hand.
+
+    $ python3 -m pytest tests/test_analysis.py
+"""
+
+import math
+import os
+import random
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import analysis
+
+
+def test_read_results_csv(tmp_path):
+    path = tmp_path / 'results.csv'
+    path.write_text(','.join(analysis.RESULT_COLUMNS) + '\n' +
+                    '0,a,3,success,12.5,host,"game, big.yaml"\n'
+                    '0,b,3,timeout,150,host,"game, big.yaml"\n'
+                    '1,a,4,error,nan,host,small.yaml\n')
+    results = analysis.read_results(str(path))
+    assert results.controllers == ['a', 'b']
+    assert results.configs == ['game, big.yaml', 'small.yaml']
+    assert results.controller.tolist() == [0, 1, 0]
+    assert results.config.tolist() == [0, 0, 1]
+    assert results.seed.tolist() == [3, 3, 4]
+    assert results.succeeded().tolist() == [True, False, False]
+    assert results.timed_out().tolist() == [False, True, False]
+    assert results.duration[:2].tolist() == [12.5, 150]
+    assert math.isnan(results.duration[2])
+
+
+def test_kaplan_meier_by_hand():
+    # At 1, one of four at risk finishes; at 2, one of three; the trial
+    # censored at 3 leaves one at risk at 4, which finishes
+    times, survival = analysis.kaplan_meier(np.array([4.0, 1.0, 3.0, 2.0]),
+                                            np.array([True, True, False, True]))
+    assert times.tolist() == [1, 2, 4]
+    assert survival == pytest.approx([3 / 4, 1 / 2, 0])
+
+def test_kaplan_meier_with_ties():
+    # A trial censored at 3 is still at risk of finishing at 3: one of six
+    # finishes there, one of four at 5, two of three at 6, and the last is
+    # censored at 8, so the estimate never reaches 0
+    times, survival = analysis.kaplan_meier(np.array([5.0, 3, 3, 8, 6, 6]),
+                                            np.array([True, True, False, False, True, True]))
+    assert times.tolist() == [3, 5, 6]
+    assert survival == pytest.approx([5 / 6, 5 / 6 * 3 / 4, 5 / 6 * 3 / 4 / 3])
+
+def test_kaplan_meier_all_censored():
+    times, survival = analysis.kaplan_meier(np.array([150.0, 150.0]),
+                                            np.array([False, False]))
+    assert len(times) == 0 and len(survival) == 0
+
+
+# Two-sided critical values of Student's t, from the usual printed table
+@pytest.mark.parametrize('p, dof, expected', [
+    (0.975, 1, 12.706),
+    (0.975, 4, 2.776),
+    (0.975, 10, 2.228),
+    (0.975, 30, 2.042),
+    (0.95, 5, 2.015),
+    (0.995, 70, 2.648),
+    (0.975, 10 ** 6, 1.960),
+])
+def test_t_ppf_matches_table(p, dof, expected):
+    assert analysis.t_ppf(p, dof) == pytest.approx(expected, abs=5e-4)
+
+def test_t_ppf_is_symmetric():
+    assert analysis.t_ppf(0.5, 7) == 0
+    assert analysis.t_ppf(0.025, 10) == pytest.approx(-analysis.t_ppf(0.975, 10))
+
+@pytest.mark.parametrize('t, dof, expected', [
+    (0, 9, 0.5),
+    # One degree of freedom is the Cauchy distribution: 1/2 + atan(t)/pi
+    (1, 1, 0.75),
+    (-1, 1, 0.25),
+    # Two have the closed form 1/2 + t / (2 sqrt(2 + t^2))
+    (2, 2, 0.5 + 1 / math.sqrt(6)),
+    # Three: 1/2 + (atan(u) + u / (1 + u^2)) / pi, with u = t / sqrt(3)
+    (-1.5, 3, 0.5 + (math.atan(-1.5 / math.sqrt(3)) +
+                     (-1.5 / math.sqrt(3)) / (1 + 0.75)) / math.pi),
+    (2, 5, 0.9490303),
+])
+def test_t_cdf_matches_closed_forms(t, dof, expected):
+    assert analysis.t_cdf(t, dof) == pytest.approx(expected, abs=1e-7)
+
+def test_t_cdf_inverts_t_ppf():
+    for dof in (1, 3, 12, 100):
+        for p in (0.6, 0.9, 0.99):
+            assert analysis.t_cdf(analysis.t_ppf(p, dof), dof) == pytest.approx(p)
+
+
+# Differences 2, 1, 0, 4, 3: mean 2, variance 10 / 4, standard error
+# sqrt(2.5 / 5) = sqrt(0.5), so t = 2 sqrt(2) on 4 degrees of freedom.
+# With four, F(t) = 1/2 + (3/8) (t / s) (1 - t^2 / (12 s^2)), s^2 = 1 + t^2 / 4,
+# which is 1/2 + (3/8) (2 sqrt(2) / sqrt(3)) (7/9) here
+FIRST = [10, 12, 9, 14, 11]
+SECOND = [8, 11, 9, 10, 8]
+T_VALUE = 2 * math.sqrt(2)
+P_VALUE = 2 * (0.5 - 3 / 8 * (2 * math.sqrt(2) / math.sqrt(3)) * 7 / 9)
+MARGIN = 2.776445 * math.sqrt(0.5)
+
+def test_paired_t_test_by_hand():
+    test = analysis.paired_t_test(np.array(FIRST, dtype=float),
+                                  np.array(SECOND, dtype=float))
+    assert test.mean_difference == pytest.approx(2)
+    assert test.std_error == pytest.approx(math.sqrt(0.5))
+    assert test.t_value == pytest.approx(T_VALUE)
+    assert test.p_value == pytest.approx(P_VALUE, abs=1e-7)
+    assert test.interval == pytest.approx((2 - MARGIN, 2 + MARGIN), abs=1e-5)
+
+def test_paired_t_test_without_spread():
+    same = np.array([3.0, 4.0, 5.0])
+    assert analysis.paired_t_test(same, same).p_value == 1
+    assert analysis.paired_t_test(same + 1, same).p_value == 0
+
+def test_compare_paired_pairs_by_seed():
+    rows = []
+    # Written out of seed order, with a seed only the first controller ran
+    # and one on which the second failed, neither of which pair up
+    for seed in (4, 0, 3, 1, 2):
+        rows.append(dict(controller='a', config='c', seed=seed,
+                         outcome='success', duration=FIRST[seed]))
+    for seed in (0, 1, 2, 3, 4):
+        rows.append(dict(controller='b', config='c', seed=seed,
+                         outcome='success', duration=SECOND[seed]))
+    rows.append(dict(controller='a', config='c', seed=5, outcome='success', duration=1))
+    rows.append(dict(controller='a', config='c', seed=6, outcome='success', duration=1))
+    rows.append(dict(controller='b', config='c', seed=6, outcome='error', duration=3))
+    comparison = analysis.compare_paired(analysis.Results.from_rows(rows), 'a', 'b')
+    assert comparison.pairs == 5
+    assert comparison.errored == 1
+    assert comparison.unpaired == 1
+    assert comparison.censored == 0
+    assert comparison.outcome_p_value == 1
+    assert comparison.t_value == pytest.approx(T_VALUE)
+    assert comparison.p_value == pytest.approx(P_VALUE, abs=1e-7)
+
+def test_compare_paired_counts_timeouts_at_the_limit():
+    rows = []
+    for seed, (first, second) in enumerate([(10, 150), (12, 150), (9, 8), (150, 150)]):
+        for name, duration in (('a', first), ('b', second)):
+            rows.append(dict(controller=name, config='c', seed=seed,
+                             outcome='success' if duration < 150 else 'timeout',
+                             duration=duration))
+    comparison = analysis.compare_paired(analysis.Results.from_rows(rows), 'a', 'b')
+    assert comparison.pairs == 4
+    assert comparison.mean_difference == pytest.approx((-140 - 138 + 1 + 0) / 4)
+    assert comparison.censored == 3
+    assert (comparison.only_first_finished, comparison.only_second_finished) == (2, 0)
+    assert comparison.outcome_p_value == pytest.approx(0.5)
+    assert 'McNemar' in analysis.format_comparison(comparison)
+
+@pytest.mark.parametrize('successes, trials, expected', [
+    (0, 0, 1),
+    (0, 5, 2 / 32),
+    (5, 5, 2 / 32),
+    (1, 6, 2 * 7 / 64),
+    (3, 6, 1),
+    (2, 10, 2 * (1 + 10 + 45) / 1024),
+])
+def test_sign_test_by_hand(successes, trials, expected):
+    assert analysis.sign_test(successes, trials) == pytest.approx(expected)
+
+def test_compare_paired_needs_two_pairs():
+    rows = [dict(controller=name, config='c', seed=0, outcome='success', duration=1)
+            for name in ('a', 'b')]
+    assert analysis.compare_paired(analysis.Results.from_rows(rows), 'a', 'b') is None
+
+
+def sequential_run(rng, test, effect, noise=10, limit=float('inf')):
+    """
+    Feed a SequentialTest simulated results until it decides: each seed's
+    layout adds the same amount to both controllers' durations, and the
+    first takes ``effect`` seconds longer on average. Trials which would
+    take longer than ``limit`` time out at it.
+    """
+    for seed in range(test.seeds):
+        layout = rng.gauss(0, 10)
+        for name, mean in ((test.first, 100 + effect), (test.second, 100)):
+            duration = mean + layout + rng.gauss(0, noise)
+            decision = test.add(dict(controller=name, config='c', seed=seed,
+                                     outcome='success' if duration < limit else 'timeout',
+                                     duration=min(duration, limit)))
+        if decision is not None:
+            return decision
+
+def test_sequential_false_positives_within_alpha():
+    # However many looks each test takes, it should find a difference
+    # which is not there no more often than alpha
+    rng = random.Random(0)
+    runs = 400
+    rejected = 0
+    for _ in range(runs):
+        decision = sequential_run(rng, analysis.SequentialTest('a', 'b', 30), effect=0)
+        assert decision is not None
+        rejected += decision in (analysis.DECISION_FIRST_FASTER,
+                                 analysis.DECISION_SECOND_FASTER)
+    assert rejected / runs <= analysis.DEFAULT_ALPHA
+
+def test_sequential_stops_early_on_a_clear_difference():
+    test = analysis.SequentialTest('a', 'b', 50)
+    decision = sequential_run(random.Random(1), test, effect=-30)
+    assert decision == analysis.DECISION_FIRST_FASTER
+    # Decided at one of the first looks, which spend little of alpha
+    completed = test.completed
+    assert completed <= 2 * analysis.LOOK_PAIRS
+    # Later results change nothing once decided
+    assert test.add(dict(controller='a', config='c', seed=99, outcome='success',
+                         duration=1)) == decision
+    assert test.completed == completed
+
+def test_sequential_stops_early_on_equivalence():
+    test = analysis.SequentialTest('a', 'b', 50, margin=5)
+    decision = sequential_run(random.Random(2), test, effect=0, noise=1)
+    assert decision == analysis.DECISION_EQUIVALENT
+    assert test.completed < test.seeds
+
+def test_sequential_spends_its_budget_without_a_decision():
+    test = analysis.SequentialTest('a', 'b', 10)
+    decision = sequential_run(random.Random(3), test, effect=0)
+    assert decision == analysis.DECISION_BUDGET_SPENT
+    assert test.completed == 10
+
+def test_sequential_false_positives_within_alpha_with_timeouts():
+    # Timeouts censor both controllers alike, and bring McNemar's test in
+    rng = random.Random(4)
+    runs = 400
+    rejected = 0
+    for _ in range(runs):
+        decision = sequential_run(rng, analysis.SequentialTest('a', 'b', 30),
+                                  effect=0, limit=105)
+        rejected += decision in (analysis.DECISION_FIRST_FASTER,
+                                 analysis.DECISION_SECOND_FASTER)
+    assert rejected / runs <= analysis.DEFAULT_ALPHA
+
+def test_sequential_stops_on_unequal_timeouts():
+    # The second times out on every seed, at a limit which hides how much
+    # slower it is
+    test = analysis.SequentialTest('a', 'b', 50)
+    decision = sequential_run(random.Random(5), test, effect=-60, noise=30, limit=100)
+    assert decision == analysis.DECISION_FIRST_FASTER
+    assert test.comparison.only_first_finished > 0
+    assert test.completed < test.seeds
+
+def test_sequential_is_never_equivalent_with_timeouts():
+    test = analysis.SequentialTest('a', 'b', 20, margin=1000)
+    decision = sequential_run(random.Random(6), test, effect=0, noise=1, limit=100)
+    assert decision == analysis.DECISION_BUDGET_SPENT
+    assert test.comparison.censored > 0
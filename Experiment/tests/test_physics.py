@@ -0,0 +1,114 @@
+"""
+Tests of the physics backends: the kinematic one must drive robots as
+Box2D does, and keep everything apart and inside the walls, and the
+adaptive profiles must only lengthen steps while that is safe.
+"""
+
+from math import hypot
+
+import pytest
+
+from sr.robot.physics import BOX2D, KINEMATIC, MAX_TRAVEL, STEP_GROWTH, create_physics
+
+ROBOT_HALF_WIDTH = 0.225
+TOKEN_HALF_WIDTH = 0.09
+STEP = 1 / 50
+
+def make_robot(physics):
+    return physics.create_body((ROBOT_HALF_WIDTH, ROBOT_HALF_WIDTH), density=60)
+
+def make_token(physics):
+    return physics.create_body((TOKEN_HALF_WIDTH, TOKEN_HALF_WIDTH), density=1,
+                               damping=0.5, restitution=0.2, friction=0.3)
+
+def drive(physics, body, left, right, steps):
+    for _ in range(steps):
+        physics.drive(body, ROBOT_HALF_WIDTH, left, right)
+        physics.step(STEP)
+
+
+@pytest.mark.parametrize('left, right', [(50, 50), (60, 20), (-40, 40), (-100, -80)])
+def test_kinematic_drives_like_box2d(left, right):
+    poses = []
+    for name in (BOX2D, KINEMATIC):
+        physics = create_physics(name, -4, 4, -4, 4)
+        robot = make_robot(physics)
+        drive(physics, robot, left, right, 100)
+        poses.append((tuple(robot.position), robot.angle))
+    (box2d_location, box2d_heading), (location, heading) = poses
+    assert location == pytest.approx(box2d_location, abs=0.02)
+    assert heading == pytest.approx(box2d_heading, abs=0.05)
+
+def test_kinematic_robot_stops_when_the_motors_do():
+    physics = create_physics(KINEMATIC, -4, 4, -4, 4)
+    robot = make_robot(physics)
+    drive(physics, robot, 100, 100, 50)
+    drive(physics, robot, 0, 0, 100)
+    assert not robot.awake
+    assert robot.linear_velocity == (0.0, 0.0)
+    stopped = robot.position
+    drive(physics, robot, 0, 0, 10)
+    assert robot.position == stopped
+
+def test_kinematic_robot_pushes_tokens_aside():
+    physics = create_physics(KINEMATIC, -4, 4, -4, 4)
+    robot = make_robot(physics)
+    tokens = []
+    for y in (-0.1, 0.0, 0.15):
+        token = make_token(physics)
+        token.position = (1.0, y)
+        tokens.append(token)
+    drive(physics, robot, 80, 80, 150)
+    assert robot.position[0] > 1.0
+    for token in tokens:
+        gap = hypot(token.position[0] - robot.position[0],
+                    token.position[1] - robot.position[1])
+        assert gap >= ROBOT_HALF_WIDTH + TOKEN_HALF_WIDTH - 1e-9
+    for i, a in enumerate(tokens):
+        for b in tokens[i + 1:]:
+            gap = hypot(a.position[0] - b.position[0], a.position[1] - b.position[1])
+            # Pushes are passed on a few times a step, so may leave a sliver
+            assert gap >= 2 * TOKEN_HALF_WIDTH - 0.01
+
+def test_kinematic_keeps_bodies_inside_walls_and_obstacles():
+    physics = create_physics(KINEMATIC, -2, 2, -2, 2)
+    wall = physics.create_body((0.15, 0.75), static=True)
+    wall.position = (0.0, 1.0)
+    robot = make_robot(physics)
+    robot.position = (-1.0, 1.0)
+    # Into the obstacle, then on into the arena's wall
+    drive(physics, robot, 100, 100, 200)
+    x, y = robot.position
+    assert x <= -0.15 - ROBOT_HALF_WIDTH + 1e-9
+    drive(physics, robot, 60, -60, 20)
+    drive(physics, robot, 100, 100, 300)
+    x, y = robot.position
+    assert -2 + ROBOT_HALF_WIDTH - 1e-9 <= x <= 2 - ROBOT_HALF_WIDTH + 1e-9
+    assert -2 + ROBOT_HALF_WIDTH - 1e-9 <= y <= 2 - ROBOT_HALF_WIDTH + 1e-9
+
+
+@pytest.mark.parametrize('name', [BOX2D, KINEMATIC])
+def test_steps_grow_while_nothing_touches(name):
+    physics = create_physics(name, -4, 4, -4, 4, profile='fast')
+    robot = make_robot(physics)
+    steps = [physics.next_time_step(STEP) for _ in range(10)]
+    assert steps[0] == pytest.approx(STEP * STEP_GROWTH)
+    assert steps == sorted(steps)
+    assert steps[-1] == pytest.approx(4 * STEP)
+    # A grab puts the step back to the physics step
+    token = make_token(physics)
+    token.position = (0.25, 0)
+    physics.attach(robot, token, 0.25)
+    assert physics.next_time_step(STEP) == STEP
+
+@pytest.mark.parametrize('name', [BOX2D, KINEMATIC])
+def test_no_step_moves_a_body_too_far(name):
+    physics = create_physics(name, -4, 4, -4, 4, profile='fast')
+    robot = make_robot(physics)
+    robot.linear_velocity = (3.0, 0.0)
+    for _ in range(10):
+        assert 3.0 * physics.next_time_step(STEP) <= MAX_TRAVEL + 1e-12
+
+def test_reference_steps_are_fixed():
+    physics = create_physics(BOX2D, -4, 4, -4, 4)
+    assert [physics.next_time_step(STEP) for _ in range(5)] == [STEP] * 5
@@ -0,0 +1,47 @@
+"""
+Tests of the arenas generated for benchmarking at scale.
+"""
+
+from math import hypot
+
+import pytest
+
+from sr.robot import Simulator
+from sr.robot.arenas.procedural_arena import TOKEN_RADIUS
+from sr.robot.markers import Token
+
+
+def build(seed, **options):
+    config = dict(game='procedural', **options)
+    return Simulator(config, background=False, headless=True,
+                     virtual_time=True, seed=seed).arena
+
+def test_token_codes_are_unique():
+    arena = build(0, size=[20, 20], tokens=500, obstacles=5)
+    tokens = [obj for obj in arena.objects if isinstance(obj, Token)]
+    assert len(tokens) == 500
+    codes = [obj.marker_info.code for obj in arena.objects
+             if obj.marker_info is not None]
+    assert len(set(codes)) == len(codes)
+    # Both colours are there, numbered from one sequence
+    assert len(set(token.marker_info.marker_type for token in tokens)) == 2
+
+def test_tokens_start_apart_where_they_were_placed():
+    arena = build(1, tokens=100, physics='box2d')
+    tokens = [obj for obj in arena.objects if isinstance(obj, Token)]
+    locations = [tuple(token.location) for token in tokens]
+    for i, (x, y) in enumerate(locations):
+        for other_x, other_y in locations[i + 1:]:
+            assert hypot(x - other_x, y - other_y) >= 2 * TOKEN_RADIUS
+    # Nothing was pushed about on the way
+    arena.tick(1 / 50)
+    assert [tuple(token.location) for token in tokens] == pytest.approx(locations)
+
+def test_same_seed_same_layout():
+    first, second = build(2, tokens=50, obstacles=2), build(2, tokens=50, obstacles=2)
+    assert ([tuple(obj.location) for obj in first.objects] ==
+            [tuple(obj.location) for obj in second.objects])
+
+def test_too_many_tokens():
+    with pytest.raises(ValueError):
+        build(0, size=[2, 2], tokens=200)
@@ -0,0 +1,50 @@
+"""
+Tests of robot scripts running in processes of their own.
+"""
+
+import time
+from math import cos, sin
+
+from sr.robot import Simulator
+from sr.robot.markers import Token
+from sr.robot.remote import RemoteController
+from sr.robot.runner import place_robot
+
+SCRIPT = '''
+from sr.robot import AlreadyHoldingSomethingException
+
+R = Robot()
+results = [R.grab()]
+try:
+    R.grab()
+except AlreadyHoldingSomethingException:
+    results.append('already holding')
+results.append(R.release())
+results.append(R.release())
+with open({0!r}, 'w') as f:
+    f.write(repr(results))
+'''
+
+def test_grab_errors_reach_the_script(tmp_path):
+    sim = Simulator({'game': 'procedural', 'tokens': 5}, background=False,
+                    headless=True)
+    robot = place_robot(sim, 0)
+    # Put a token right in front of the grabber
+    token = next(obj for obj in sim.arena.objects if isinstance(obj, Token))
+    (x, y), heading = robot.location, robot.heading
+    token.location = (x + 0.3 * cos(heading), y + 0.3 * sin(heading))
+
+    output = tmp_path / 'results'
+    script = tmp_path / 'robot.py'
+    script.write_text(SCRIPT.format(str(output)))
+    controller = RemoteController(sim, robot, str(script))
+    try:
+        deadline = time.time() + 30
+        while controller.is_alive() and time.time() < deadline:
+            controller.step(0)
+            time.sleep(0.001)
+        assert not controller.is_alive()
+    finally:
+        controller.close()
+    assert controller.exception is None
+    assert output.read_text() == repr([True, 'already holding', True, False])
@@ -0,0 +1,60 @@
+"""
+Tests of how robot scripts are told apart and run.
+"""
+
+import textwrap
+
+import pytest
+
+from sr.robot.runner import (SCRIPT_ASYNC, SCRIPT_STEP, SCRIPT_THREADED,
+                             script_kind)
+
+
+@pytest.mark.parametrize('source, kind', [
+    ('''
+     R = Robot()
+     while True:
+         R.motors[0].m0.power = 50
+     ''', SCRIPT_THREADED),
+    # A helper named like a step function does not make a step script
+    ('''
+     def step(R, power):
+         R.motors[0].m0.power = power
+     R = Robot()
+     while True:
+         step(R, 50)
+     ''', SCRIPT_THREADED),
+    ('''
+     def controller(R):
+         pass
+     if __name__ == '__main__':
+         run(Robot())
+     ''', SCRIPT_THREADED),
+    ('''
+     def step(R, markers):
+         return 50, 50
+     ''', SCRIPT_STEP),
+    ('''
+     def controller(R):
+         while True:
+             markers = yield 50, 50
+     ''', SCRIPT_STEP),
+    # Calling Robot() only inside a function is not running one's own loop
+    ('''
+     def make():
+         return Robot()
+     def step(R, markers):
+         return None
+     ''', SCRIPT_STEP),
+    ('''
+     async def main(R):
+         await sleep(1)
+     ''', SCRIPT_ASYNC),
+    ('''
+     print('nothing to run')
+     ''', SCRIPT_THREADED),
+])
+def test_script_kind(tmp_path, source, kind):
+    script = tmp_path / 'robot.py'
+    script.write_text(textwrap.dedent(source))
+    assert script_kind(str(script)) == kind
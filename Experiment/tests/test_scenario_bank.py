@@ -0,0 +1,35 @@
+"""
+Tests of banks of pre-generated scenarios.
+"""
+
+import pytest
+
+from sr.robot import Simulator
+from sr.robot.scenario_bank import ScenarioBank, generate_bank, placed_objects
+
+CONFIG = {'game': 'procedural', 'size': [6, 6], 'tokens': 12, 'obstacles': 1}
+
+def simulate(config, seed):
+    return Simulator(dict(config), background=False, headless=True,
+                     virtual_time=True, seed=seed)
+
+def saved_bank(tmp_path, config, count):
+    path = str(tmp_path / 'bank.npz')
+    generate_bank(config, count).save(path)
+    return path
+
+def test_arenas_start_from_their_scenario(tmp_path):
+    path = saved_bank(tmp_path, CONFIG, 3)
+    bank = ScenarioBank.load(path)
+    # Wraps around the end of the bank; the physics makes no difference
+    sim = simulate(dict(CONFIG, scenarios=path, physics='box2d'), 4)
+    poses = [value for obj in placed_objects(sim.arena)
+             for value in (obj.location[0], obj.location[1], obj.heading)]
+    assert poses == pytest.approx(bank.poses[1].ravel().tolist(), abs=1e-6)
+
+def test_a_bank_for_another_config_is_refused(tmp_path):
+    path = saved_bank(tmp_path, CONFIG, 2)
+    with pytest.raises(ValueError):
+        simulate(dict(CONFIG, tokens=13, scenarios=path), 0)
+    with pytest.raises(ValueError):
+        simulate({'game': 'two-colours-assignment', 'scenarios': path}, 0)
@@ -0,0 +1,78 @@
+"""
+Tests of the spatial index arenas keep to find objects near a point, and
+of the sampler procedural arenas place objects with.
+"""
+
+import random
+from math import hypot
+
+from sr.robot.spatial import DiscSampler, SpatialGrid
+
+
+class Thing(object):
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return self.name
+
+
+def scattered(count, rng):
+    return [(Thing(str(i)), (rng.uniform(-4, 4), rng.uniform(-4, 4)))
+            for i in range(count)]
+
+def test_near_finds_everything_within_radius_in_insertion_order():
+    rng = random.Random(0)
+    grid = SpatialGrid(0.5)
+    things = scattered(300, rng)
+    for thing, location in things:
+        grid.insert(thing, location)
+    order = dict((thing, i) for i, (thing, _) in enumerate(things))
+    for _ in range(50):
+        x, y, radius = rng.uniform(-4, 4), rng.uniform(-4, 4), rng.uniform(0, 2)
+        found = grid.near(x, y, radius)
+        within = set(thing for thing, (tx, ty) in things
+                     if hypot(tx - x, ty - y) <= radius)
+        assert within <= set(found)
+        assert [order[thing] for thing in found] == sorted(order[thing] for thing in found)
+
+def test_update_and_remove():
+    grid = SpatialGrid(1.0)
+    first, second = Thing('first'), Thing('second')
+    grid.insert(first, (0.5, 0.5))
+    grid.insert(second, (5.5, 5.5))
+    assert grid.near(0.5, 0.5, 0.1) == [first]
+    grid.update(second, (0.6, 0.6))
+    assert grid.near(0.5, 0.5, 0.1) == [first, second]
+    assert grid.near(5.5, 5.5, 0.1) == []
+    grid.remove(first)
+    assert first not in grid
+    assert grid.near(0.5, 0.5, 0.1) == [second]
+    assert len(grid) == 1
+
+def test_disc_sampler_places_nothing_overlapping():
+    sampler = DiscSampler(-3, -3, 3, 3, cell_size=0.5, rng=random.Random(0))
+    sampler.add(0, 0, 1)
+    # A shape's own discs may overlap, as those along a wall do
+    shapes = [[(0, 0, 0.15)], [(-0.3, 0, 0.2), (0, 0, 0.2), (0.3, 0, 0.2)]]
+    placed = [[(0, 0, 1)]]
+    for i in range(200):
+        discs = shapes[i % 2]
+        location = sampler.place(discs, 100)
+        if location is not None:
+            x, y = location
+            placed.append([(x + dx, y + dy, radius) for dx, dy, radius in discs])
+    assert len(placed) > 50
+    for i, shape in enumerate(placed):
+        for x, y, radius in shape:
+            assert -3 <= x - radius and x + radius <= 3
+            assert -3 <= y - radius and y + radius <= 3
+            for other in placed[i + 1:]:
+                for other_x, other_y, other_radius in other:
+                    assert hypot(x - other_x, y - other_y) >= radius + other_radius
+
+def test_disc_sampler_gives_up_when_full():
+    sampler = DiscSampler(0, 0, 1, 1, cell_size=0.5, rng=random.Random(0))
+    assert sampler.place([(0, 0, 0.4)], 10) is not None
+    assert sampler.place([(0, 0, 0.4)], 100) is None
+    assert sampler.place([(0, 0, 0.6)], 100) is None
@@ -0,0 +1,127 @@
+"""
+Tests of what robots see: the vectorised pass over the arena's object
+snapshot must give exactly the markers the original per-object filter did.
+"""
+
+import random
+from math import atan2, degrees, hypot
+
+import pytest
+
+from sr.robot import Simulator
+from sr.robot.runner import place_robot
+from sr.robot.sim_robot import HALF_FOV_WIDTH, MOTION_BLUR_SPEED_THRESHOLD, SimRobot
+
+
+def speed(obj):
+    vx, vy = obj._body.linear_velocity
+    return hypot(vx, vy)
+
+def filtered_markers(robot):
+    """
+    The markers the robot sees by the filter see() used to apply to each
+    object in turn, as (code, distance, bearing).
+    """
+    x, y = robot._body.position
+    heading = robot._body.angle
+    if speed(robot) > MOTION_BLUR_SPEED_THRESHOLD:
+        return []
+    seen = []
+    for obj in robot.arena.objects:
+        if obj.marker_info is None or obj is robot:
+            continue
+        if isinstance(obj, SimRobot) and speed(obj) > MOTION_BLUR_SPEED_THRESHOLD:
+            continue
+        ox, oy = obj._body.position if getattr(obj, '_body', None) else obj.location
+        direction = atan2(oy - y, ox - x)
+        if -HALF_FOV_WIDTH < direction - heading < HALF_FOV_WIDTH:
+            rel_x, rel_y = ox - x, oy - y
+            seen.append((obj.marker_info.code, hypot(rel_x, rel_y),
+                         degrees(atan2(rel_y, rel_x) - heading)))
+    return seen
+
+def captured_markers(robot):
+    return [(marker.info.code, marker.dist, marker.rot_y)
+            for marker in robot._capture((800, 600), 0)]
+
+
+@pytest.mark.parametrize('config', [
+    {'game': 'two-colours-assignment'},
+    {'game': 'procedural', 'size': [8, 8], 'tokens': 60, 'obstacles': 3},
+])
+def test_see_matches_per_object_filter(config):
+    sim = Simulator(dict(config), background=False, headless=True,
+                    virtual_time=True, seed=1)
+    robots = [place_robot(sim, zone) for zone in range(2)]
+    rng = random.Random(0)
+    for _ in range(20):
+        # Drive about for a while, then look from wherever the robots got to
+        for robot in robots:
+            robot.motors[0].m0.power = rng.uniform(-100, 100)
+            robot.motors[0].m1.power = rng.uniform(-100, 100)
+        for _ in range(5):
+            sim.arena.tick(1 / 30)
+        for robot in robots:
+            # Bit for bit, not approximately
+            assert captured_markers(robot) == filtered_markers(robot)
+
+def test_see_from_any_pose():
+    sim = Simulator({'game': 'procedural', 'tokens': 40}, background=False,
+                    headless=True, virtual_time=True, seed=2)
+    robot = place_robot(sim, 0)
+    rng = random.Random(1)
+    seen_any = False
+    for _ in range(50):
+        robot.location = (rng.uniform(-3.5, 3.5), rng.uniform(-3.5, 3.5))
+        robot.heading = rng.uniform(-4, 4)
+        markers = captured_markers(robot)
+        assert markers == filtered_markers(robot)
+        seen_any = seen_any or bool(markers)
+    assert seen_any
+
+
+def test_camera_shares_a_frame_until_the_next_capture():
+    sim = Simulator({'game': 'procedural', 'tokens': 20}, background=False,
+                    headless=True, virtual_time=True, seed=3,
+                    camera_ticks_per_frame=2)
+    robot = place_robot(sim, 0)
+    first = robot.see()
+    assert robot.see() is first
+    # Half way through the frame period, the same frame still stands
+    sim.arena.tick(1 / 30)
+    assert robot.see() is first
+    sim.arena.tick(1 / 30)
+    second = robot.see()
+    assert second is not first
+    assert second.number == first.number + 1
+    assert list(second) == list(first)
+    # Asking at another resolution captures afresh
+    small = robot.see((320, 240))
+    assert small is not second and small.res == (320, 240)
+
+
+def test_object_snapshot_follows_the_bodies_and_is_never_modified():
+    sim = Simulator({'game': 'two-colours-assignment'}, background=False,
+                    headless=True, virtual_time=True, seed=4)
+    robot = place_robot(sim, 0)
+    robot.motors[0].m0.power = robot.motors[0].m1.power = 100
+    held = sim.arena.object_state()
+    before = held.locations.copy(), held.headings.copy(), held.velocities.copy()
+    for _ in range(20):
+        sim.arena.tick(1 / 30)
+    robot.location = (1.5, -1.0)
+
+    # The snapshot taken before is just as it was
+    assert (held.locations == before[0]).all()
+    assert (held.headings == before[1]).all()
+    assert (held.velocities == before[2]).all()
+
+    state = sim.arena.object_state()
+    assert state is not held
+    assert state.pose(robot) == ((1.5, -1.0), robot._body.angle)
+    for obj in state.objects:
+        body = getattr(obj, '_body', None)
+        if body is not None:
+            assert state.pose(obj) == (tuple(body.position), body.angle)
+    row = state.rows[robot]
+    assert state.codes[row] == -1 and not state.marked[row] and state.blurs[row]